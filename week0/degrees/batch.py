@@ -0,0 +1,109 @@
+"""
+Answers many degrees queries from a file in parallel.
+
+Usage: python batch.py [--bidirectional] [--workers=N] directory queries.csv output.csv
+
+Each row of queries.csv holds a source and a target, as IMDB person ids or
+names. output.csv gets one row per query with the degrees of separation
+(-1 if not connected) and the path as movie_id:person_id steps.
+"""
+
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+
+# Rows processed between progress reports
+REPORT_EVERY = 1000
+
+
+def main():
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    workers = os.cpu_count()
+    bidirectional = False
+    for option in options:
+        if option == "--bidirectional":
+            bidirectional = True
+        elif option.startswith("--workers=") and option[len("--workers="):].isdigit():
+            workers = int(option[len("--workers="):])
+        else:
+            arguments = None
+            break
+    if arguments is None or len(arguments) != 3 or workers < 1:
+        sys.exit("Usage: python batch.py [--bidirectional] [--workers=N] directory queries.csv output.csv")
+    directory, queries, output = arguments
+
+    # load once in this process, workers inherit the graph when forked instead of loading their own
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print("Data loaded.")
+
+    with open(queries, encoding="utf-8") as f:
+        pairs = [(row[0], row[1], bidirectional) for row in csv.reader(f) if len(row) >= 2]
+
+    start = time.perf_counter()
+    with pool(workers, directory) as workers_pool, open(output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "target", "degrees", "path"])
+        chunksize = max(1, min(256, len(pairs) // (workers * 4)))
+        for i, row in enumerate(workers_pool.imap(answer, pairs, chunksize), start=1):
+            writer.writerow(row)
+            if i % REPORT_EVERY == 0:
+                report(i, start)
+    report(len(pairs), start)
+
+
+def pool(workers, directory):
+    """
+    Returns a pool of worker processes that share this process' loaded graph,
+    forking where the platform allows it.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork").Pool(workers)
+
+    # without fork each worker has to load the graph itself, from the snapshot
+    return multiprocessing.Pool(workers, initializer=degrees.load_data,
+                                initargs=(directory, True))
+
+
+def report(done, start):
+    """Prints the number of queries answered so far, and the rate."""
+    seconds = time.perf_counter() - start
+    rate = done / seconds if seconds else 0
+    print(f"{done} queries in {seconds:.1f}s ({rate:.0f} queries/sec)")
+
+
+def resolve(person):
+    """
+    Returns the person id for an IMDB id or an unambiguous name, or None.
+    """
+    if person in degrees.people:
+        return person
+    person_ids = degrees.names.get(person.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return None
+
+
+def answer(query):
+    """
+    Returns the output row for a (source, target, bidirectional) query.
+    """
+    source, target, bidirectional = query
+    source_id = resolve(source)
+    target_id = resolve(target)
+    if source_id is None or target_id is None:
+        return [source, target, "", "person not found or ambiguous"]
+
+    path = degrees.shortest_path(source_id, target_id, bidirectional)
+    if path is None:
+        return [source, target, -1, ""]
+    return [source, target, len(path), " ".join(f"{movie}:{person}" for movie, person in path)]
+
+
+if __name__ == "__main__":
+    main()
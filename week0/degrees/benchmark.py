@@ -0,0 +1,466 @@
+"""
+Micro-benchmarks for the degrees search.
+
+Usage: python benchmark.py [benchmark ...]
+       python benchmark.py --data=directory
+
+With --data, loads and queries the dataset in directory (for example one
+made by generate.py) and reports load time, peak memory and query latency
+percentiles instead of running the micro-benchmarks.
+"""
+
+import csv
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import degrees
+import generate
+import graph
+import nameindex
+from generate import random_name
+from util import Node, QueueFrontier, DequeQueueFrontier, DisjointSet
+
+# Star rows in the generated datasets that the scale benchmark loads and queries
+SCALE_SIZES = (10 ** 4, 10 ** 5, 10 ** 6)
+
+# Queries timed for latency percentiles, for each kind of search
+BIDIRECTIONAL_QUERIES = 200
+ONE_SIDED_QUERIES = 20
+
+
+def synthetic_data(n_people, n_movies, cast_size=8, seed=0, names=False):
+    """
+    Fills degrees' `people`, `movies` and `names` with a random co-star graph
+    of `n_people` people and `n_movies` movies, each with `cast_size` stars.
+
+    People are called "Person <id>", or given random made-up names if names is True.
+    """
+    rng = random.Random(seed)
+    unload()
+
+    for i in range(n_people):
+        person_id = str(i)
+        name = random_name(rng) if names else f"Person {i}"
+        degrees.people[person_id] = {"name": name, "birth": "", "movies": set()}
+        degrees.names.setdefault(name.lower(), set()).add(person_id)
+
+    for i in range(n_movies):
+        movie_id = str(i)
+        degrees.movies[movie_id] = {"title": f"Movie {i}", "year": "", "stars": set()}
+        for person in rng.sample(range(n_people), cast_size):
+            degrees.people[str(person)]["movies"].add(movie_id)
+            degrees.movies[movie_id]["stars"].add(str(person))
+
+
+def explore(source, frontier_class):
+    """
+    Breadth-first search from source over the whole component using the
+    given frontier class, returning the number of people explored.
+    """
+    frontier = frontier_class()
+    frontier.add(Node(source, None, None))
+    explored = set()
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node.state)
+        for movie, person in degrees.neighbors_for_person(node.state):
+            if not frontier.contains_state(person) and person not in explored:
+                frontier.add(Node(person, node, movie))
+    return len(explored)
+
+
+def timed(function, *args):
+    """Returns the result of calling function, and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark_frontier():
+    """Compares the list-backed and deque-backed queue frontiers on a full BFS."""
+    for n_people in (1000, 2000, 4000):
+        synthetic_data(n_people, n_people // 2)
+        print(f"  {n_people} people:")
+        for frontier_class in (QueueFrontier, DequeQueueFrontier):
+            explored, seconds = timed(explore, "0", frontier_class)
+            print(f"    {frontier_class.__name__:<20} {seconds:8.3f}s  ({explored} explored)")
+
+
+@contextmanager
+def counted_visits():
+    """
+    Swaps degrees.neighbors_for_person for a wrapper that counts how many
+    people a search expands, yielding the counter.
+    """
+    neighbors_for_person = degrees.neighbors_for_person
+    counter = {"visited": 0}
+
+    def counting(person_id):
+        counter["visited"] += 1
+        return neighbors_for_person(person_id)
+
+    degrees.neighbors_for_person = counting
+    try:
+        yield counter
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+
+
+def benchmark_bidirectional(queries=50):
+    """Compares people visited by the one-sided and bidirectional searches."""
+    synthetic_data(50000, 20000)
+    rng = random.Random(1)
+    pairs = [(str(rng.randrange(50000)), str(rng.randrange(50000))) for _ in range(queries)]
+    for bidirectional in (False, True):
+        with counted_visits() as counter:
+            paths, seconds = timed(lambda: [degrees.shortest_path(source, target, bidirectional)
+                                            for source, target in pairs])
+        lengths = [len(path) for path in paths if path is not None]
+        label = "bidirectional" if bidirectional else "one-sided"
+        print(f"    {label:<14} {counter['visited'] / queries:10.1f} visited/query  "
+              f"{seconds / queries * 1000:8.2f} ms/query  "
+              f"(mean degrees {sum(lengths) / len(lengths):.2f})")
+
+
+def write_csv(directory):
+    """Writes degrees' loaded people, movies and stars to CSV files in directory."""
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id, person in degrees.people.items():
+            writer.writerow([person_id, person["name"], person["birth"]])
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id, movie in degrees.movies.items():
+            writer.writerow([movie_id, movie["title"], movie["year"]])
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id, movie in degrees.movies.items():
+            for person_id in movie["stars"]:
+                writer.writerow([person_id, movie_id])
+
+
+def benchmark_compact(queries=30):
+    """Compares memory and search speed of the dictionary and compact layouts."""
+    synthetic_data(100000, 40000)
+    rng = random.Random(2)
+    pairs = [(str(rng.randrange(100000)), str(rng.randrange(100000))) for _ in range(queries)]
+    sample = [str(rng.randrange(100000)) for _ in range(2000)]
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(directory)
+        for compact in (False, True):
+            degrees.graph = None
+            degrees.people, degrees.movies, degrees.names = {}, {}, {}
+            gc.collect()
+            tracemalloc.start()
+            _, load_seconds = timed(degrees.load_data, directory, compact)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            # neighbor iteration on each layout's native ids
+            if compact:
+                indices = [degrees.graph.person_index(person_id) for person_id in sample]
+                _, neighbor_seconds = timed(lambda: [degrees.graph.neighbors(i) for i in indices])
+            else:
+                _, neighbor_seconds = timed(lambda: [degrees.neighbors_for_person(p) for p in sample])
+            _, query_seconds = timed(lambda: [degrees.shortest_path(s, t) for s, t in pairs])
+
+            label = "compact" if compact else "dictionaries"
+            print(f"    {label:<13} {memory / 2 ** 20:8.1f} MiB  load {load_seconds:6.2f}s  "
+                  f"neighbors {neighbor_seconds / len(sample) * 1e6:6.1f} us/person  "
+                  f"query {query_seconds / queries * 1000:7.2f} ms")
+
+
+def benchmark_snapshot():
+    """Compares loading the compact graph from CSV files and from its snapshot."""
+    synthetic_data(100000, 40000)
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(directory)
+        _, parse_seconds = timed(degrees.load_data, directory, True)
+        _, mapped_seconds = timed(degrees.load_data, directory, True)
+        size = os.path.getsize(os.path.join(directory, graph.SNAPSHOT_NAME))
+        print(f"    csv parse + snapshot write {parse_seconds:8.3f}s")
+        print(f"    snapshot map               {mapped_seconds:8.3f}s  ({size / 2 ** 20:.1f} MiB)")
+
+
+def benchmark_tree(targets=1000):
+    """Compares one-to-many queries by repeated search and by a cached search tree."""
+    synthetic_data(100000, 40000)
+    rng = random.Random(4)
+    people = [str(rng.randrange(100000)) for _ in range(targets)]
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(directory)
+        for compact in (False, True):
+            degrees.load_data(directory, compact)
+            label = "compact" if compact else "dictionaries"
+            _, search_seconds = timed(lambda: [degrees.shortest_path("0", p) for p in people[:20]])
+            _, first_seconds = timed(degrees.path_from_tree, "0", people[0])
+            _, cached_seconds = timed(lambda: [degrees.path_from_tree("0", p) for p in people])
+            print(f"    {label:<13} search {search_seconds / 20 * 1000:8.2f} ms/query  "
+                  f"tree build {first_seconds * 1000:8.2f} ms  "
+                  f"cached {cached_seconds / targets * 1e6:6.2f} us/query  "
+                  f"({degrees.trees.bytes / 2 ** 20:.1f} MiB cached)")
+
+
+def benchmark_components(queries=10):
+    """Times queries to people outside the source's component, with and without the component check."""
+    synthetic_data(100000, 40000)
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(directory)
+        for compact in (False, True):
+            _, load_seconds = timed(degrees.load_data, directory, compact)
+            sizes = sorted(degrees.component_sizes, reverse=True)
+            giant = max(range(len(degrees.component_sizes)), key=degrees.component_sizes.__getitem__)
+            source = next(p for p in degrees.people if degrees.component_of(p) == giant)
+            targets = [p for p in degrees.people if degrees.component_of(p) != giant][:queries]
+            neighbors = degrees.graph.neighbors if compact else degrees.neighbors_for_person
+            index = degrees.graph.person_index if compact else (lambda person_id: person_id)
+            _, search_seconds = timed(lambda: [degrees.breadth_first_path(index(source), index(t), neighbors)
+                                               for t in targets])
+            _, checked_seconds = timed(lambda: [degrees.shortest_path(source, t) for t in targets])
+            label = "compact" if compact else "dictionaries"
+            print(f"    {label:<13} load {load_seconds:6.2f}s  {len(sizes)} components, largest {sizes[:3]}  "
+                  f"not connected: search {search_seconds / queries * 1000:8.2f} ms  "
+                  f"checked {checked_seconds / queries * 1e6:6.2f} us")
+
+
+def benchmark_costars(queries=10):
+    """Compares searching with neighbors built on the fly and with precomputed co-stars."""
+    synthetic_data(100000, 40000)
+    rng = random.Random(6)
+    pairs = [(str(rng.randrange(100000)), str(rng.randrange(100000))) for _ in range(queries)]
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(directory)
+        for compact in (False, True):
+            degrees.load_data(directory, compact)
+            label = "compact" if compact else "dictionaries"
+            _, fly_seconds = timed(lambda: [degrees.shortest_path(s, t) for s, t in pairs])
+            size, build_seconds = timed(degrees.build_costars)
+            _, built_seconds = timed(lambda: [degrees.shortest_path(s, t) for s, t in pairs])
+            print(f"    {label:<13} on the fly {fly_seconds / queries * 1000:8.2f} ms/query  "
+                  f"precomputed {built_seconds / queries * 1000:8.2f} ms/query  "
+                  f"(build {build_seconds:.2f}s, {size / 2 ** 20:.1f} MiB)")
+
+
+def benchmark_names(queries=200):
+    """Compares the name index against a linear scan of every name."""
+    synthetic_data(200000, 1000, names=True)
+    rng = random.Random(7)
+    people = list(degrees.people.items())
+    pairs = [(person["name"], person_id) for person_id, person in people]
+    samples = [rng.choice(people)[1]["name"] for _ in range(queries)]
+    prefixes = [name[:rng.randrange(1, len(name))] for name in samples]
+    typos = [typo(name, rng) for name in samples]
+
+    index, build_seconds = timed(degrees.name_index)
+    _, segment_seconds = timed(index.build_segments)
+    print(f"    {len(pairs)} names, sorted index {build_seconds:.2f}s, segments {segment_seconds:.2f}s")
+
+    _, indexed = timed(lambda: [index.complete(prefix) for prefix in prefixes])
+    _, scanned = timed(lambda: [[(name, person_id) for name, person_id in pairs
+                                 if name.lower().startswith(prefix.lower())][:10]
+                                for prefix in prefixes[:20]])
+    print(f"    prefix  index {indexed / queries * 1e6:9.1f} us/query  scan {scanned / 20 * 1e6:9.1f} us/query")
+
+    found, indexed = timed(lambda: [index.search(query) for query in typos])
+    _, scanned = timed(lambda: [[name for name, _ in pairs
+                                 if nameindex.edit_distance(query.lower(), name.lower(), 2) <= 2]
+                                for query in typos[:5]])
+    hits = sum(any(name == sample for name, _ in result) for result, sample in zip(found, samples))
+    print(f"    fuzzy   index {indexed / queries * 1e6:9.1f} us/query  scan {scanned / 5 * 1e6:9.1f} us/query  "
+          f"({hits}/{queries} found the intended name)")
+
+
+def typo(name, rng):
+    """Returns name with one random letter replaced, dropped or doubled."""
+    i = rng.randrange(len(name))
+    kind = rng.randrange(3)
+    if kind == 0:
+        return name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:]
+    if kind == 1:
+        return name[:i] + name[i + 1:]
+    return name[:i] + name[i] + name[i:]
+
+
+def benchmark_updates(fraction=0.01):
+    """Compares applying a delta of new movies with reloading everything."""
+    synthetic_data(100000, 40000)
+    movie_ids = list(degrees.movies)
+    new = movie_ids[int(len(movie_ids) * (1 - fraction)):]
+    delta = {movie_id: degrees.movies.pop(movie_id) for movie_id in new}
+    with tempfile.TemporaryDirectory() as base, tempfile.TemporaryDirectory() as updates:
+        write_csv(base)
+        with open(os.path.join(updates, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "title", "year"])
+            writer.writerows([movie_id, movie["title"], movie["year"]] for movie_id, movie in delta.items())
+        with open(os.path.join(updates, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "movie_id"])
+            writer.writerows([person_id, movie_id] for movie_id, movie in delta.items() for person_id in movie["stars"])
+
+        snapshot = os.path.join(base, graph.SNAPSHOT_NAME)
+        for compact in (False, True):
+
+            # a compact load parses the CSV files when there is no snapshot, and writes one
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+            degrees.load_data(base, not compact)
+            _, csv_seconds = timed(degrees.load_data, base, compact)
+            label = "compact" if compact else "dictionaries"
+            loads = f"full load from csv {csv_seconds:6.2f}s"
+            if compact:
+                _, snapshot_seconds = timed(degrees.load_data, base, compact)
+                loads += f"  from snapshot {snapshot_seconds:6.2f}s"
+            _, update_seconds = timed(degrees.load_updates, updates)
+            degrees.load_data(base, compact)
+            degrees.build_costars()
+            _, costar_seconds = timed(degrees.load_updates, updates)
+            print(f"    {label:<13} {loads}  {len(new)} new movies {update_seconds:6.2f}s "
+                  f"({costar_seconds:6.2f}s with co-stars)")
+
+
+def benchmark_paths(queries=10, k=10):
+    """Times the first and all shortest paths, and the k shortest, against one shortest_path."""
+    synthetic_data(100000, 40000)
+    rng = random.Random(8)
+    pairs = [(str(rng.randrange(100000)), str(rng.randrange(100000))) for _ in range(queries)]
+    _, single = timed(lambda: [degrees.shortest_path(s, t) for s, t in pairs])
+    _, meeting = timed(lambda: [degrees.shortest_path(s, t, bidirectional=True) for s, t in pairs])
+    _, first = timed(lambda: [next(degrees.all_shortest_paths(s, t), None) for s, t in pairs])
+    counts, every = timed(lambda: [sum(1 for _ in degrees.all_shortest_paths(s, t)) for s, t in pairs])
+    _, ranked = timed(lambda: [list(degrees.k_shortest_paths(s, t, k)) for s, t in pairs])
+    print(f"    shortest_path {single / queries * 1000:8.2f} ms  bidirectional {meeting / queries * 1000:8.2f} ms  "
+          f"first of all {first / queries * 1000:8.2f} ms  "
+          f"all {every / queries * 1000:8.2f} ms (mean {sum(counts) / queries:.0f} paths)  "
+          f"{k} shortest {ranked / queries * 1000:8.2f} ms")
+
+
+def benchmark_scale():
+    """Loads and queries generated datasets of growing size in both layouts."""
+    for stars in SCALE_SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            n_people, n_movies, _ = generate.generate(directory, stars)
+            print(f"  {stars} stars ({n_people} people, {n_movies} movies):")
+            profile(directory)
+
+
+def profile(directory, seed=9):
+    """
+    Prints load time, peak memory while loading, and shortest_path latency
+    percentiles for the dataset in directory, in each layout.
+
+    Compact loads always parse the CSV files: any snapshot already there is
+    moved aside while the benchmark runs and put back afterwards.
+    """
+    snapshot = os.path.join(directory, graph.SNAPSHOT_NAME)
+    saved = f"{snapshot}.saved"
+    if os.path.exists(snapshot):
+        os.replace(snapshot, saved)
+    try:
+        for compact in (False, True):
+            profile_layout(directory, compact, snapshot, seed)
+    finally:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+        if os.path.exists(saved):
+            os.replace(saved, snapshot)
+        unload()
+
+
+def profile_layout(directory, compact, snapshot, seed):
+    """Prints profile's figures for one layout, removing any snapshot before each load."""
+    label = "compact" if compact else "dictionaries"
+
+    # time one load untraced, since tracing slows allocation, then load again to measure memory
+    seconds = peak = 0
+    for traced in (False, True):
+        unload()
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+        if traced:
+            tracemalloc.start()
+            degrees.load_data(directory, compact)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            _, seconds = timed(degrees.load_data, directory, compact)
+    print(f"    {label:<13} load {seconds:7.2f}s  peak {peak / 2 ** 20:8.1f} MiB")
+
+    rng = random.Random(seed)
+    people = list(degrees.people)
+    for bidirectional, queries in ((True, BIDIRECTIONAL_QUERIES), (False, ONE_SIDED_QUERIES)):
+        pairs = [(rng.choice(people), rng.choice(people)) for _ in range(queries)]
+        latencies = []
+        for source, target in pairs:
+            _, query_seconds = timed(degrees.shortest_path, source, target, bidirectional)
+            latencies.append(query_seconds * 1000)
+        print(f"    {'':<13} {'bidirectional' if bidirectional else 'one-sided':<13} "
+              f"{percentiles(latencies)}  ({queries} queries)")
+
+
+def percentiles(latencies):
+    """Formats the median, 90th and 99th percentile and worst of latencies, in milliseconds."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return (f"p50 {cuts[49]:8.2f} ms  p90 {cuts[89]:8.2f} ms  "
+            f"p99 {cuts[98]:8.2f} ms  max {max(latencies):8.2f} ms")
+
+
+def unload():
+    """Drops degrees' loaded data, so the next load's memory is measured on its own."""
+    degrees.graph = None
+    degrees.people, degrees.movies, degrees.names = {}, {}, {}
+    degrees.components, degrees.component_sizes = {}, []
+    degrees.disjoint = DisjointSet()
+    degrees.costars = None
+    degrees.names_index = None
+    degrees.trees.clear()
+    gc.collect()
+
+
+BENCHMARKS = {
+    "frontier": benchmark_frontier,
+    "bidirectional": benchmark_bidirectional,
+    "compact": benchmark_compact,
+    "snapshot": benchmark_snapshot,
+    "tree": benchmark_tree,
+    "components": benchmark_components,
+    "costars": benchmark_costars,
+    "names": benchmark_names,
+    "updates": benchmark_updates,
+    "paths": benchmark_paths,
+    "scale": benchmark_scale,
+}
+
+
+def main():
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    selected = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    for option in options:
+        if not option.startswith("--data=") or selected:
+            sys.exit("Usage: python benchmark.py [benchmark ...] or python benchmark.py --data=directory")
+        directory = option[len("--data="):]
+        print(f"{directory}:")
+        profile(directory)
+    if options:
+        return
+
+    selected = selected or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark: {name}. Choose from: {', '.join(BENCHMARKS)}")
+        print(f"{name}:")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import csv
+import heapq
+import os
 import sys
+import time
+from collections import deque
+from itertools import islice
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph
+from nameindex import NameIndex
+from util import Node, DequeQueueFrontier, TreeCache, DisjointSet
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,64 +19,186 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps person_ids to the number of their connected component, and the number of people in each component
+components = {}
+component_sizes = []
 
-def load_data(directory):
+# Union-find over people who starred together, that components is labelled from
+disjoint = DisjointSet()
+
+# Maps person_ids to a tuple of (movie_id, person_id) pairs, one per co-star, once build_costars has run
+# (COSTAR_PAIR_BYTES approximates the size of one pair)
+costars = None
+COSTAR_PAIR_BYTES = 64
+
+# Index of names for completion and fuzzy search, built by name_index when first needed
+names_index = None
+
+# Compact integer-indexed graph, when loaded with compact=True
+graph = None
+
+# Breadth-first search trees from recent sources, used by path_from_tree
+# (TREE_ENTRY_BYTES approximates one (movie_id, person_id) step of a dictionary tree)
+TREE_CACHE_BYTES = 256 * 2 ** 20
+TREE_ENTRY_BYTES = 64
+trees = TreeCache(TREE_CACHE_BYTES)
+
+# Command line options accepted by main
+OPTIONS = {"--bidirectional", "--compact", "--costars"}
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+
+    If compact is True, loads the data into a Graph instead, and points
+    names, people and movies at read-only views of it. The Graph is cached
+    in a snapshot file in directory, which later runs memory-map as long as
+    the CSV files are unchanged.
+    """
+    global graph, names, people, movies, components, component_sizes, disjoint, costars, names_index
+    trees.clear()
+    costars = None
+    names_index = None
+    if compact:
+        graph = Graph.load(directory)
+        names, people, movies = graph.names, graph.people, graph.movies
+        components, component_sizes = {}, graph.component_sizes
+        return
+
+    # switching back from a compact graph, start again from empty dictionaries
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+        disjoint = DisjointSet()
+
+    with open(f"{directory}/people.csv", encoding="utf-8") as people_file, \
+            open(f"{directory}/movies.csv", encoding="utf-8") as movies_file, \
+            open(f"{directory}/stars.csv", encoding="utf-8") as stars_file:
+        update_data(csv.DictReader(people_file), csv.DictReader(movies_file), csv.DictReader(stars_file))
+
+
+def load_updates(directory):
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    Adds the rows of whichever of people.csv, movies.csv and stars.csv are
+    in directory (such as a daily delta) to the data already loaded.
+    """
+    rows = []
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                rows.append(list(csv.DictReader(f)))
+        else:
+            rows.append([])
+    update_data(*rows)
+
+
+def update_data(people_rows=(), movie_rows=(), star_rows=()):
+    """
+    Adds rows in the format of people.csv, movies.csv and stars.csv to the
+    loaded data in place, keeping components, co-stars and the name index
+    up to date. Cached search trees are dropped, as paths may have changed.
+
+    A compact Graph cannot grow in place, so it is rebuilt from its own
+    arrays plus the new rows.
+    """
+    global graph, names, people, movies, components, component_sizes, names_index
+    trees.clear()
+    if graph is not None:
+        graph = graph.extended(people_rows, movie_rows, star_rows)
+        names, people, movies = graph.names, graph.people, graph.movies
+        component_sizes = graph.component_sizes
+        names_index = None
+        return
+
+    # Load people, keeping the movies of anyone already loaded and moving them to their new name
+    for row in people_rows:
+        old = people.get(row["id"])
+        if old is not None and old["name"].lower() != row["name"].lower():
+            names[old["name"].lower()].discard(row["id"])
+            if not names[old["name"].lower()]:
+                del names[old["name"].lower()]
+        people[row["id"]] = {
+            "name": row["name"],
+            "birth": row["birth"],
+            "movies": old["movies"] if old is not None else set()
+        }
+        if row["name"].lower() not in names:
+            names[row["name"].lower()] = {row["id"]}
+        else:
+            names[row["name"].lower()].add(row["id"])
+
+        # the name index cannot rename an entry, so it is rebuilt on next use instead
+        if names_index is not None:
+            if old is None:
+                names_index.add(row["name"], row["id"])
+            elif old["name"] != row["name"]:
+                names_index = None
+
+    # Load movies, keeping the stars of any already loaded
+    for row in movie_rows:
+        movies[row["id"]] = {
+            "title": row["title"],
+            "year": row["year"],
+            "stars": movies[row["id"]]["stars"] if row["id"] in movies else set()
+        }
+
+    # Load stars, noting whose co-stars change
+    changed = set()
+    for row in star_rows:
+        try:
+            person_movies = people[row["person_id"]]["movies"]
+            stars = movies[row["movie_id"]]["stars"]
+        except KeyError:
+            continue
+        person_movies.add(row["movie_id"])
+
+        # every star of a movie is already in one component, so joining any of them is enough
+        if stars:
+            disjoint.union(row["person_id"], next(iter(stars)))
+        stars.add(row["person_id"])
+        if costars is not None:
+            changed.update(stars)
+
+    # Number the connected components
+    components, component_sizes = disjoint.labels(people)
+
+    # new people with no stars yet still need an (empty) entry
+    if costars is not None:
+        changed.update(row["id"] for row in people_rows)
+        for person_id in changed:
+            costars[person_id] = costars_for(person_id)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    # options start with "--", anything else is the directory
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(arguments) > 1 or any(option not in OPTIONS for option in options):
+        sys.exit("Usage: python degrees.py [--bidirectional] [--compact] [--costars] [directory]")
+    directory = arguments[0] if arguments else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact="--compact" in options)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    if "--costars" in options:
+        start = time.perf_counter()
+        size = build_costars()
+        print(f"Co-stars built in {time.perf_counter() - start:.2f}s ({size / 2 ** 20:.1f} MiB).")
+
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(name))
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(name))
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional="--bidirectional" in options)
 
     if path is None:
         print("Not connected.")
@@ -84,11 +213,47 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def not_found_message(name):
+    """
+    Returns the message for a name that was not found, suggesting close
+    matches if there are any.
+    """
+    suggestions = search_names(name, limit=3)
+    if not suggestions:
+        return "Person not found."
+    return "Person not found. Did you mean: " + ", ".join(name for name, _ in suggestions) + "?"
+
+
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If no possible path, returns None.
+
+    If bidirectional is True, searches from both ends at once
+    (see bidirectional_path).
+    """
+
+    # people in different components can never be connected, so skip the search
+    if not connected(source, target):
+        return None
+
+    search = bidirectional_path if bidirectional else breadth_first_path
+
+    # with a compact graph loaded, search on its integer indices and translate the path back to IMDB ids
+    if graph is not None:
+        path = search(graph.person_index(source), graph.person_index(target), graph.neighbors)
+        return None if path is None else graph.path_ids(path)
+
+    return search(source, target, neighbors_for_person)
+
+
+def breadth_first_path(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs that connect the
+    source to the target, using neighbors(person) to expand each person.
+
     If no possible path, returns None.
     """
 
@@ -97,7 +262,7 @@ def shortest_path(source, target):
 
     # frontier and starting position
     start = Node(source, None, None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(start)
 
     # loop until solution found
@@ -129,11 +294,11 @@ def shortest_path(source, target):
             path.reverse()
             return path
         
-        # add node to explored
-        explored.add(node)
+        # add the person to explored --- storing the state, not the node, so the membership test below can match
+        explored.add(node.state)
 
         # add neighbors to frontier
-        for movie, person in neighbors_for_person(node.state):   
+        for movie, person in neighbors(node.state):   
 
             # if the person is not in the frontier and has not been explored         
             if not frontier.contains_state(person) and person not in explored:
@@ -150,6 +315,325 @@ def shortest_path(source, target):
                 # add the unexplored person to the frontier
                 frontier.add(Node(state=person, parent=node, action=movie))
 
+
+def component_of(person_id):
+    """
+    Returns the number of the connected component person_id is in, or None
+    if they have not been assigned one (people added by hand).
+    """
+    if graph is not None:
+        return graph.components[graph.person_index(person_id)]
+    return components.get(person_id)
+
+
+def connected(source, target):
+    """
+    Returns False if source and target are known to be in different connected
+    components, in which case there is no path between them.
+    """
+    source_component = component_of(source)
+    target_component = component_of(target)
+    if source_component is None or target_component is None:
+        return True
+    return source_component == target_component
+
+
+def path_from_tree(source, target):
+    """
+    Returns the same kind of path as shortest_path, read off a breadth-first
+    search tree of everyone reachable from source.
+
+    The tree is built on the first query from source and kept in trees,
+    so later queries from the same source only walk the path.
+    """
+    if not connected(source, target):
+        return None
+
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+
+    tree = trees.get(source)
+    if tree is None:
+        if graph is not None:
+            tree = graph.bfs_tree(source)
+            trees.put(source, tree, tree.nbytes)
+        else:
+            tree = bfs_tree(source, neighbors_for_person)
+            trees.put(source, tree, sys.getsizeof(tree) + len(tree) * TREE_ENTRY_BYTES)
+
+    if target not in tree:
+        return None
+
+    # walk back from the target to the source, then reverse to get the path in order
+    path = []
+    person = target
+    step = tree.get(person)
+    while step is not None:
+        movie, parent = step
+        path.append((movie, person))
+        person = parent
+        step = tree.get(person)
+    path.reverse()
+
+    return path if graph is None else graph.path_ids(path)
+
+
+def bfs_tree(source, neighbors):
+    """
+    Returns a dictionary mapping everyone reachable from source to the
+    (movie, person) step back towards source, with None for source itself.
+    """
+    tree = {source: None}
+    frontier = deque([source])
+    while frontier:
+        person = frontier.popleft()
+        for movie, neighbor in neighbors(person):
+            if neighbor not in tree:
+                tree[neighbor] = (movie, person)
+                frontier.append(neighbor)
+    return tree
+
+
+def bidirectional_path(source, target, neighbors, skip_forward=None, skip_backward=None):
+    """
+    Returns the same kind of path as breadth_first_path, found by searching
+    outward from the source and the target at the same time.
+
+    Each step expands a whole level of whichever side has the smaller
+    frontier, and the search stops as soon as the two sides meet. The
+    optional skip functions are given (person, movie, neighbor) and return
+    True for steps that side of the search must not take.
+    """
+
+    if source == target:
+        return []
+
+    # maps each person reached to the (movie_id, person_id) step back towards that side's start
+    forward = {source: None}
+    backward = {target: None}
+
+    # the people on the outer level of each side
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # loop until one side runs out of people, then there is no solution
+    while forward_frontier and backward_frontier:
+
+        # grow the smaller side by one level
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(forward_frontier, forward, backward, neighbors, skip_forward)
+        else:
+            backward_frontier, meeting = expand_level(backward_frontier, backward, forward, neighbors, skip_backward)
+
+        if meeting is not None:
+
+            # walk back from the meeting person to the source, then reverse to get the first half in order
+            path = []
+            person = meeting
+            while forward[person] is not None:
+                movie, parent = forward[person]
+                path.append((movie, person))
+                person = parent
+            path.reverse()
+
+            # walk from the meeting person to the target, each step is already in order
+            person = meeting
+            while backward[person] is not None:
+                movie, person = backward[person]
+                path.append((movie, person))
+
+            return path
+
+    return None
+
+
+def expand_level(frontier, parents, other, neighbors, skip=None):
+    """
+    Expands every person in frontier by one step, recording how each new person
+    was reached in parents.
+
+    Returns the next frontier, and the first person also reached by the other
+    side of the search (or None if the sides have not met).
+    """
+    next_frontier = []
+    for person in frontier:
+        for movie, neighbor in neighbors(person):
+            if neighbor in parents:
+                continue
+            if skip is not None and skip(person, movie, neighbor):
+                continue
+            parents[neighbor] = (movie, person)
+            if neighbor in other:
+                return next_frontier, neighbor
+            next_frontier.append(neighbor)
+    return next_frontier, None
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that connects
+    the source to the target, one at a time.
+
+    People who starred together in several movies give one path per movie
+    (one per pair once build_costars has run).
+    """
+    if not connected(source, target):
+        return
+    if graph is not None:
+        for path in layered_paths(graph.person_index(source), graph.person_index(target), graph.neighbors):
+            yield graph.path_ids(path)
+    else:
+        yield from layered_paths(source, target, neighbors_for_person)
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Yields up to k distinct paths, without repeated people, that connect
+    the source to the target, shortest first.
+    """
+    if not connected(source, target):
+        return
+    if graph is not None:
+        for path in islice(ranked_paths(graph.person_index(source), graph.person_index(target), graph.neighbors), k):
+            yield graph.path_ids(path)
+    else:
+        yield from islice(ranked_paths(source, target, neighbors_for_person), k)
+
+
+def layered_paths(source, target, neighbors):
+    """
+    Yields every shortest list of (movie, person) pairs from source to target.
+
+    Searches outward from both ends like bidirectional_path, but expands
+    whole levels and records, for each person, every (movie, person) step
+    back towards that side's start. The search stops at the level where
+    the sides meet, and every shortest path goes through exactly one of the
+    people met there. Paths are walked through those steps lazily, so the
+    first arrives about as soon as bidirectional_path's and none is built
+    before it is needed.
+    """
+    if source == target:
+        yield []
+        return
+
+    # maps each person reached to their steps back towards that side's start
+    forward = {source: []}
+    backward = {target: []}
+
+    forward_frontier = [source]
+    backward_frontier = [target]
+    meeting = []
+
+    # grow the smaller side a level at a time until the sides meet or one runs out
+    while forward_frontier and backward_frontier and not meeting:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier = expand_layer(forward_frontier, forward, neighbors)
+            meeting = [person for person in forward_frontier if person in backward]
+        else:
+            backward_frontier = expand_layer(backward_frontier, backward, neighbors)
+            meeting = [person for person in backward_frontier if person in forward]
+
+    for person in meeting:
+        for first_half in walk_steps(forward, person, source):
+            first_half.reverse()
+            for second_half in walk_steps(backward, person, target, reverse=False):
+                yield first_half + second_half
+
+
+def expand_layer(frontier, steps, neighbors):
+    """
+    Returns the level after frontier, recording in steps every (movie,
+    person) step from each new person back to frontier.
+    """
+    next_frontier = []
+    new = set()
+    for person in frontier:
+        for movie, neighbor in neighbors(person):
+            if neighbor not in steps:
+                steps[neighbor] = []
+                new.add(neighbor)
+                next_frontier.append(neighbor)
+            if neighbor in new:
+                steps[neighbor].append((movie, person))
+    return next_frontier
+
+
+def walk_steps(steps, person, end, reverse=True):
+    """
+    Yields each list of (movie, person) pairs that follows steps from person
+    to end, depth first. With reverse, each step is the one into the person
+    it was recorded for, so the list runs from person back to end (for the
+    side searched from the source); otherwise it is the step out of it
+    towards end.
+    """
+    stack = [(person, [])]
+    while stack:
+        person, path = stack.pop()
+        if person == end:
+            yield path
+            continue
+        for movie, other in reversed(steps[person]):
+            stack.append((other, path + [(movie, person if reverse else other)]))
+
+
+def ranked_paths(source, target, neighbors):
+    """
+    Yields the paths from source to target that do not repeat a person,
+    shortest first (Yen's algorithm).
+
+    Each new path is found by taking a prefix (the root) of the last path
+    found, banning the steps the paths found so far take after that same
+    root, and searching for the shortest way on from its last person that
+    avoids the root's other people.
+    """
+    first = restricted_path(source, target, neighbors, set(), set())
+    if first is None:
+        return
+    found = [first]
+    yield first
+
+    # candidate paths as (length, order found, path), and every path ever queued
+    candidates = []
+    seen = {tuple(first)}
+
+    while True:
+        last = found[-1]
+        people_on_path = [source] + [person for _, person in last]
+        for i in range(len(last)):
+            root = last[:i]
+            banned_steps = {path[i] for path in found if len(path) > i and path[:i] == root}
+            spur = restricted_path(people_on_path[i], target, neighbors,
+                                   set(people_on_path[:i]), banned_steps)
+            if spur is None:
+                continue
+            candidate = root + spur
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (len(candidate), len(seen), candidate))
+
+        if not candidates:
+            return
+        _, _, path = heapq.heappop(candidates)
+        found.append(path)
+        yield path
+
+
+def restricted_path(source, target, neighbors, banned_people, banned_steps):
+    """
+    Returns the shortest list of (movie, person) pairs from source to target
+    that never visits a person in banned_people and does not start with a
+    step in banned_steps, or None.
+    """
+
+    def skip_forward(person, movie, neighbor):
+        return neighbor in banned_people or (person == source and (movie, neighbor) in banned_steps)
+
+    def skip_backward(person, movie, neighbor):
+        return neighbor in banned_people or (neighbor == source and (movie, person) in banned_steps)
+
+    return bidirectional_path(source, target, neighbors, skip_forward, skip_backward)
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -176,11 +660,79 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def build_costars():
+    """
+    Precomputes everyone's co-stars, keeping one movie per pair of people,
+    so neighbors_for_person no longer builds a set on each call.
+
+    Returns the approximate size of the adjacency in bytes.
+    """
+    global costars
+    if graph is not None:
+        return graph.build_costars()
+
+    costars = {}
+    size = sys.getsizeof(costars)
+    for person_id in people:
+        costars[person_id] = costars_for(person_id)
+        size += sys.getsizeof(costars[person_id]) + len(costars[person_id]) * COSTAR_PAIR_BYTES
+    return size
+
+
+def costars_for(person_id):
+    """
+    Returns a tuple of (movie_id, person_id) pairs, one for each of
+    person_id's co-stars.
+    """
+    witnesses = {}
+    for movie_id in people[person_id]["movies"]:
+        for star in movies[movie_id]["stars"]:
+            if star != person_id and star not in witnesses:
+                witnesses[star] = movie_id
+    return tuple((movie_id, star) for star, movie_id in witnesses.items())
+
+
+def name_index():
+    """
+    Returns the NameIndex over everyone loaded, building it on first use.
+    """
+    global names_index
+    if names_index is None:
+        if graph is not None:
+            names_index = NameIndex(zip(graph.person_names, graph.person_ids))
+        else:
+            names_index = NameIndex((person["name"], person_id) for person_id, person in people.items())
+    return names_index
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to limit (name, person_id) pairs for people whose name
+    starts with prefix, ignoring case.
+    """
+    return name_index().complete(prefix, limit)
+
+
+def search_names(query, limit=10):
+    """
+    Returns up to limit (name, person_id) pairs for people whose name is
+    within a couple of typos of query, closest first.
+    """
+    return name_index().search(query, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
+
+    Once build_costars has run, returns each co-star once, with one
+    movie they share (and not the person themself).
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+    if costars is not None:
+        return costars[person_id]
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
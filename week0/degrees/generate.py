@@ -0,0 +1,101 @@
+"""
+Generates synthetic people, movies and stars CSV files for the degrees search.
+
+Usage: python generate.py [--seed=N] directory stars
+
+Writes about `stars` rows to stars.csv, plus the people and movies they
+refer to. As in the IMDB data, cast sizes follow a power law (most movies
+have a handful of stars, a few have hundreds) and so does how often each
+person stars, so a few people are in very many movies and most in one or two.
+"""
+
+import csv
+import os
+import random
+import sys
+
+# Syllables that random names are made from
+SYLLABLES = ["an", "bel", "cor", "da", "el", "fin", "gra", "ha", "is", "jo", "ka", "li",
+             "mar", "ne", "ol", "pe", "quin", "ro", "sa", "ter", "ul", "vi", "wen", "ya", "zo"]
+
+# Smallest and largest cast, and the Pareto exponent of cast sizes in between
+MIN_CAST = 3
+MAX_CAST = 300
+CAST_EXPONENT = 1.6
+
+# Star rows per person on average, and how strongly popular people are favoured
+# (a person's index is n_people * u ** PERSON_SKEW for uniform u)
+STARS_PER_PERSON = 2.5
+PERSON_SKEW = 2.0
+
+
+def main():
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    seed = 0
+    for option in options:
+        if option.startswith("--seed=") and option[len("--seed="):].isdigit():
+            seed = int(option[len("--seed="):])
+        else:
+            arguments = None
+            break
+    if arguments is None or len(arguments) != 2 or not arguments[1].isdigit():
+        sys.exit("Usage: python generate.py [--seed=N] directory stars")
+    directory, stars = arguments[0], int(arguments[1])
+
+    n_people, n_movies, n_stars = generate(directory, stars, seed)
+    print(f"Wrote {n_people} people, {n_movies} movies and {n_stars} stars to {directory}")
+
+
+def generate(directory, stars, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with about `stars` star rows
+    to directory, creating it if needed.
+
+    Rows are written as they are made, so even 10^7 stars need little memory.
+    Person and movie ids are "0", "1", ... Returns the number of people,
+    movies and stars written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    n_people = max(MAX_CAST, int(stars / STARS_PER_PERSON))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(n_people):
+            writer.writerow([i, random_name(rng), rng.randint(1900, 2005) if rng.random() < 0.8 else ""])
+
+    n_movies = n_stars = 0
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as stars_file:
+        movies_writer = csv.writer(movies_file)
+        stars_writer = csv.writer(stars_file)
+        movies_writer.writerow(["id", "title", "year"])
+        stars_writer.writerow(["person_id", "movie_id"])
+        while n_stars < stars:
+            movies_writer.writerow([n_movies, f"Movie {n_movies}", rng.randint(1920, 2020)])
+            cast = set()
+            for _ in range(min(cast_size(rng), stars - n_stars)):
+                cast.add(int(n_people * rng.random() ** PERSON_SKEW))
+            stars_writer.writerows([person, n_movies] for person in cast)
+            n_movies += 1
+            n_stars += len(cast)
+
+    return n_people, n_movies, n_stars
+
+
+def cast_size(rng):
+    """Returns a random cast size, from a Pareto distribution cut off at MAX_CAST."""
+    return min(MAX_CAST, int(MIN_CAST * rng.paretovariate(CAST_EXPONENT)))
+
+
+def random_name(rng):
+    """Returns a made-up first and last name."""
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    return f"{first.capitalize()} {last.capitalize()}"
+
+
+if __name__ == "__main__":
+    main()
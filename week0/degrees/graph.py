@@ -0,0 +1,782 @@
+import csv
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Mapping, Sequence
+from itertools import repeat
+
+from util import DisjointSet
+
+
+# Snapshot files start with this marker, then the length of a JSON header describing the sections
+SNAPSHOT_MAGIC = b"DEGSNAP2"
+SNAPSHOT_NAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored in a snapshot, in order
+STRING_TABLES = ("person_ids", "person_names", "person_births", "movie_ids", "movie_titles", "movie_years")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "person_order", "movie_order", "name_order", "components", "component_sizes")
+
+
+class StringTable(Sequence):
+    """
+    A read-only list of strings stored as one UTF-8 buffer plus an array of
+    offsets, instead of one Python object per string.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        data = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(bytes(data), offsets)
+
+    def updated(self, replacements, appended):
+        """
+        Returns a new table with the strings at the indices in replacements
+        changed and the strings in appended added at the end, copying the
+        unchanged runs of the buffer as they are.
+        """
+        pieces = []
+        offsets = array("q")
+        position = shift = 0
+        for i in sorted(replacements):
+            extend_shifted(offsets, self.offsets[position:i + 1], shift)
+            pieces.append(self.data[self.offsets[position]:self.offsets[i]])
+            encoded = replacements[i].encode("utf-8")
+            pieces.append(encoded)
+            shift += len(encoded) - (self.offsets[i + 1] - self.offsets[i])
+            position = i + 1
+        extend_shifted(offsets, self.offsets[position:], shift)
+        pieces.append(self.data[self.offsets[position]:])
+        for string in appended:
+            encoded = string.encode("utf-8")
+            pieces.append(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+        return StringTable(b"".join(pieces), offsets)
+
+    def __getitem__(self, i):
+        if i < 0 or i >= len(self):
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class Graph():
+    """
+    The people/movies/stars data with IMDB ids mapped to dense integers.
+
+    Person i starred in movies person_movies[person_offsets[i]:person_offsets[i + 1]]
+    and movie j has stars movie_stars[movie_offsets[j]:movie_offsets[j + 1]]
+    (compressed sparse row adjacency).
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order, movie_order, name_order, components, component_sizes):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # person and movie indices sorted by IMDB id, and people sorted by lowercase name, for binary search
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+
+        # the connected component of each person, and the number of people in each component
+        self.components = components
+        self.component_sizes = component_sizes
+
+        # optional person -> co-star adjacency with one witness movie per pair, see build_costars
+        self.costar_offsets = None
+        self.costars = None
+        self.costar_movies = None
+
+        # dictionary-like views in the same shape as degrees' people, movies and names
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names = NamesView(self)
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Loads the graph for directory from its snapshot file, if the snapshot
+        is up to date with the CSV files, and otherwise from the CSV files,
+        writing a new snapshot for next time.
+        """
+        path = os.path.join(directory, SNAPSHOT_NAME)
+        sources = source_stamps(directory)
+        try:
+            return cls.open_snapshot(path, sources)
+        except (OSError, ValueError):
+            pass
+
+        graph = cls.from_csv(directory)
+
+        # a snapshot is only a cache, so carry on without one if the directory is not writable
+        try:
+            graph.save_snapshot(path, sources)
+        except OSError:
+            pass
+        return graph
+
+    @classmethod
+    def open_snapshot(cls, path, sources):
+        """
+        Memory-maps a snapshot written by save_snapshot.
+
+        Raises ValueError if it is not a snapshot, was written for different
+        sources, or is damaged (a bad header, or a file too short for its
+        sections).
+        """
+        with open(path, "rb") as f:
+            snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(snapshot)
+        start = len(SNAPSHOT_MAGIC) + 8
+        if len(view) < start or bytes(view[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError("not a degrees snapshot")
+        (length,) = struct.unpack("<q", view[len(SNAPSHOT_MAGIC):start])
+        if not 0 <= length <= len(view) - start:
+            raise ValueError("snapshot header is cut short")
+        header = json.loads(bytes(view[start:start + length]))
+        if not isinstance(header, dict) or header.get("sources") != sources:
+            raise ValueError("snapshot is out of date")
+
+        def section(name):
+            try:
+                offset, size, typecode = header["sections"][name]
+                if not start + length <= offset <= offset + size <= len(view):
+                    raise ValueError(f"snapshot is cut short in section {name}")
+                return view[offset:offset + size].cast(typecode)
+            except (KeyError, TypeError) as error:
+                raise ValueError(f"bad snapshot section {name}") from error
+
+        tables = [StringTable(section(f"{name}.data"), section(f"{name}.offsets"))
+                  for name in STRING_TABLES]
+        return cls(*tables, *[section(name) for name in ARRAYS])
+
+    def save_snapshot(self, path, sources):
+        """
+        Writes the graph to path in a form open_snapshot can memory-map,
+        recording sources so that stale snapshots are ignored.
+        """
+        sections = []
+        for name in STRING_TABLES:
+            table = getattr(self, name)
+            sections.append((f"{name}.data", memoryview(table.data).cast("B"), "B"))
+            sections.append((f"{name}.offsets", table.offsets, item_type(table.offsets)))
+        for name in ARRAYS:
+            values = getattr(self, name)
+            sections.append((name, values, item_type(values)))
+
+        # lay the sections out after the header, each aligned to 8 bytes
+        def header_bytes(offset):
+            layout = {}
+            for name, values, typecode in sections:
+                offset += -offset % 8
+                size = len(values) * struct.calcsize(typecode)
+                layout[name] = [offset, size, typecode]
+                offset += size
+            return json.dumps({"sources": sources, "sections": layout}).encode("utf-8")
+
+        # the header length depends on the offsets it contains, so grow it until it fits
+        length = 0
+        header = header_bytes(0)
+        while len(header) > length:
+            length = len(header) + 64
+            header = header_bytes(len(SNAPSHOT_MAGIC) + 8 + length)
+
+        # write to a temporary file first so a reader never maps a half-written snapshot
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<q", length))
+            f.write(header.ljust(length))
+            for name, values, typecode in sections:
+                f.write(bytes(-f.tell() % 8))
+                f.write(values)
+        os.replace(temporary, path)
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Loads people.csv, movies.csv and stars.csv from directory.
+        """
+        with open(f"{directory}/people.csv", encoding="utf-8") as people, \
+                open(f"{directory}/movies.csv", encoding="utf-8") as movies, \
+                open(f"{directory}/stars.csv", encoding="utf-8") as stars:
+            return cls.from_rows(csv.DictReader(people), csv.DictReader(movies), csv.DictReader(stars))
+
+    @classmethod
+    def from_rows(cls, people_rows, movie_rows, star_rows):
+        """
+        Builds a graph from rows in the format of people.csv, movies.csv and
+        stars.csv. Only the first row for each id is used.
+        """
+        person_index = {}
+        person_ids, person_names, person_births = [], [], []
+        for row in people_rows:
+            if row["id"] in person_index:
+                continue
+            person_index[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            person_births.append(row["birth"])
+
+        movie_index = {}
+        movie_ids, movie_titles, movie_years = [], [], []
+        for row in movie_rows:
+            if row["id"] in movie_index:
+                continue
+            movie_index[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
+            movie_titles.append(row["title"])
+            movie_years.append(row["year"])
+
+        # encode each (person, movie) pair as one integer, skipping rows for unknown ids
+        n_movies = len(movie_ids)
+        pairs = set()
+        for row in star_rows:
+            try:
+                pairs.add(person_index[row["person_id"]] * n_movies + movie_index[row["movie_id"]])
+            except KeyError:
+                pass
+
+        person_offsets, person_movies, movie_offsets, movie_stars = cls.adjacency(
+            sorted(pairs), len(person_ids), n_movies)
+        components, component_sizes = cls.find_components(len(person_ids), movie_offsets, movie_stars)
+
+        return cls(
+            StringTable.from_strings(person_ids),
+            StringTable.from_strings(person_names),
+            StringTable.from_strings(person_births),
+            StringTable.from_strings(movie_ids),
+            StringTable.from_strings(movie_titles),
+            StringTable.from_strings(movie_years),
+            person_offsets, person_movies, movie_offsets, movie_stars,
+            array("i", sorted(range(len(person_ids)), key=person_ids.__getitem__)),
+            array("i", sorted(range(n_movies), key=movie_ids.__getitem__)),
+            array("i", sorted(range(len(person_ids)), key=lambda i: person_names[i].lower())),
+            components, component_sizes
+        )
+
+    def extended(self, people_rows, movie_rows, star_rows):
+        """
+        Returns a new graph with the given rows added, without parsing the
+        CSV files again. A row for a person or movie already present
+        replaces their name and birth, or title and year, keeping their stars
+        (the last row wins if an id is sent twice).
+
+        Only the adjacency slices of people and movies gaining stars are
+        rebuilt, every other slice is copied as it is, and components are
+        merged through the new pairs alone.
+        """
+        n_people, n_movies = len(self.person_ids), len(self.movie_ids)
+
+        # new people and movies get the next indices, rows for ones already present replace their details
+        new_people, person_details = self.new_entries(people_rows, "name", "birth", self.person_index, n_people)
+        new_movies, movie_details = self.new_entries(movie_rows, "title", "year", self.movie_index, n_movies)
+        total_people, total_movies = n_people + len(new_people), n_movies + len(new_movies)
+
+        # the (person, movie) pairs not already present, grouped both ways, skipping rows for unknown ids
+        added_movies = {}
+        added_stars = {}
+        for row in star_rows:
+            person = new_people.get(row["person_id"])
+            if person is None:
+                person = self.person_index(row["person_id"])
+            movie = new_movies.get(row["movie_id"])
+            if movie is None:
+                movie = self.movie_index(row["movie_id"])
+            if person is None or movie is None:
+                continue
+            if person < n_people and movie < n_movies and movie in self.movies_for(person):
+                continue
+            added_movies.setdefault(person, set()).add(movie)
+            added_stars.setdefault(movie, set()).add(person)
+
+        person_offsets, person_movies = spliced(
+            self.person_offsets, self.person_movies,
+            {person: sorted([*self.slice_of(self.movies_for, person, n_people), *movies])
+             for person, movies in added_movies.items()},
+            total_people)
+        movie_offsets, movie_stars = spliced(
+            self.movie_offsets, self.movie_stars,
+            {movie: sorted([*self.slice_of(self.stars_for, movie, n_movies), *stars])
+             for movie, stars in added_stars.items()},
+            total_movies)
+        components, component_sizes = self.merged_components(added_stars, len(new_people))
+
+        def table(strings, details, field, new):
+            return strings.updated({i: detail[field] for i, detail in details.items() if i < len(strings)},
+                                   [details[i][field] for i in sorted(new.values())])
+
+        person_ids = self.person_ids.updated({}, sorted(new_people, key=new_people.get))
+        person_names = table(self.person_names, person_details, 0, new_people)
+        movie_ids = self.movie_ids.updated({}, sorted(new_movies, key=new_movies.get))
+
+        # people whose name changed move within name_order, new people and movies are inserted into each order
+        renamed = [person for person, (name, _) in person_details.items()
+                   if person < n_people and name.lower() != self.person_names[person].lower()]
+        name = lambda person: person_names[person].lower()
+        graph = Graph(
+            person_ids, person_names, table(self.person_births, person_details, 1, new_people),
+            movie_ids, table(self.movie_titles, movie_details, 0, new_movies),
+            table(self.movie_years, movie_details, 1, new_movies),
+            person_offsets, person_movies, movie_offsets, movie_stars,
+            inserted(self.person_order, (), new_people.values(), person_ids.__getitem__),
+            inserted(self.movie_order, (), new_movies.values(), movie_ids.__getitem__),
+            inserted(self.name_order, renamed, [*renamed, *new_people.values()], name),
+            components, component_sizes
+        )
+
+        # only people who gained a movie, or share a movie that gained a star, have new co-stars
+        if self.costars is not None:
+            changed = set(added_movies)
+            for movie in added_stars:
+                changed.update(graph.stars_for(movie))
+            witnesses = {person: graph.witnesses(person) for person in changed}
+            graph.costar_offsets, graph.costars = spliced(
+                self.costar_offsets, self.costars,
+                {person: list(found) for person, found in witnesses.items()}, total_people)
+            _, graph.costar_movies = spliced(
+                self.costar_offsets, self.costar_movies,
+                {person: list(found.values()) for person, found in witnesses.items()}, total_people)
+        return graph
+
+    @staticmethod
+    def new_entries(rows, first, second, index_of, count):
+        """
+        Returns a dictionary of ids not yet in the graph to the indices they
+        get (from count up), and one of each index in rows to its
+        (first, second) fields.
+        """
+        new = {}
+        details = {}
+        for row in rows:
+            i = new.get(row["id"])
+            if i is None:
+                i = index_of(row["id"])
+            if i is None:
+                i = new[row["id"]] = count + len(new)
+            details[i] = (row[first], row[second])
+        return new, details
+
+    @staticmethod
+    def slice_of(slice_for, i, count):
+        """Returns slice_for(i), or nothing for an index added after the first count."""
+        return slice_for(i) if i < count else ()
+
+    def merged_components(self, added_stars, n_new_people):
+        """
+        Returns the components and component sizes once the new people and
+        the new stars of each movie in added_stars are added, numbered in
+        order of first appearance like find_components. Each old component
+        and each new person is one item of a union-find, joined through
+        the stars of the movies that gained some.
+        """
+        n_people, n_components = len(self.person_ids), len(self.component_sizes)
+        if not added_stars and not n_new_people:
+            return self.components, self.component_sizes
+
+        def label(person):
+            return self.components[person] if person < n_people else n_components + person - n_people
+
+        sets = DisjointSet()
+        for movie, stars in added_stars.items():
+            existing = self.stars_for(movie) if movie < len(self.movie_ids) else ()
+            first = label(existing[0] if len(existing) else next(iter(stars)))
+            for star in stars:
+                sets.union(first, label(star))
+
+        numbers = {}
+
+        def number(person):
+            root = sets.find(label(person))
+            if root not in numbers:
+                numbers[root] = len(numbers)
+            return numbers[root]
+
+        components = array("i", (number(person) for person in range(n_people + n_new_people)))
+        component_sizes = array("q", repeat(0, len(numbers)))
+        for old, size in enumerate(self.component_sizes):
+            component_sizes[numbers[sets.find(old)]] += size
+        for person in range(n_people, n_people + n_new_people):
+            component_sizes[components[person]] += 1
+        return components, component_sizes
+
+    @staticmethod
+    def adjacency(pairs, n_people, n_movies):
+        """
+        Builds both CSR adjacencies from sorted person * n_movies + movie pairs.
+        """
+        person_offsets = array("q", repeat(0, n_people + 1))
+        person_movies = array("i", repeat(0, len(pairs)))
+        movie_offsets = array("q", repeat(0, n_movies + 1))
+        for k, pair in enumerate(pairs):
+            person, movie = divmod(pair, n_movies)
+            person_offsets[person + 1] += 1
+            movie_offsets[movie + 1] += 1
+            person_movies[k] = movie
+
+        # turn counts into running offsets
+        for i in range(n_people):
+            person_offsets[i + 1] += person_offsets[i]
+        for j in range(n_movies):
+            movie_offsets[j + 1] += movie_offsets[j]
+
+        # scatter the people into each movie's slice, in person order
+        movie_stars = array("i", repeat(0, len(pairs)))
+        filled = movie_offsets[:-1]
+        for person in range(n_people):
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                movie_stars[filled[movie]] = person
+                filled[movie] += 1
+
+        return person_offsets, person_movies, movie_offsets, movie_stars
+
+    @staticmethod
+    def find_components(n_people, movie_offsets, movie_stars):
+        """
+        Returns the connected component of each person, numbered in order of
+        first appearance, and the number of people in each component, using
+        union-find over the stars of each movie.
+        """
+        parents = array("i", range(n_people))
+
+        def root(person):
+            while parents[person] != person:
+                parents[person] = parents[parents[person]]
+                person = parents[person]
+            return person
+
+        # join everyone in a movie to the root of its first star
+        for movie in range(len(movie_offsets) - 1):
+            start, end = movie_offsets[movie], movie_offsets[movie + 1]
+            if start == end:
+                continue
+            first = root(movie_stars[start])
+            for k in range(start + 1, end):
+                other = root(movie_stars[k])
+                if other != first:
+                    parents[other] = first
+
+        # number the roots, labelling each root the first time one of its people is seen
+        components = array("i", repeat(-1, n_people))
+        component_sizes = array("q")
+        for person in range(n_people):
+            person_root = root(person)
+            if components[person_root] == -1:
+                components[person_root] = len(component_sizes)
+                component_sizes.append(0)
+            components[person] = components[person_root]
+            component_sizes[components[person]] += 1
+
+        return components, component_sizes
+
+    def person_index(self, person_id):
+        """Returns the integer index of an IMDB person id, or None."""
+        return self.find(self.person_ids, self.person_order, person_id)
+
+    def movie_index(self, movie_id):
+        """Returns the integer index of an IMDB movie id, or None."""
+        return self.find(self.movie_ids, self.movie_order, movie_id)
+
+    @staticmethod
+    def find(table, order, key):
+        i = bisect_left(order, key, key=table.__getitem__)
+        if i < len(order) and table[order[i]] == key:
+            return order[i]
+        return None
+
+    def people_named(self, name):
+        """Returns the indices of the people whose lowercase name is name."""
+        lower = name.lower()
+        key = lambda i: self.person_names[i].lower()
+        start = bisect_left(self.name_order, lower, key=key)
+        end = bisect_right(self.name_order, lower, lo=start, key=key)
+        return self.name_order[start:end]
+
+    def movies_for(self, person):
+        """Returns the movie indices person starred in."""
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """Returns the person indices starring in movie."""
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def build_costars(self):
+        """
+        Precomputes each person's co-stars as CSR arrays, keeping one movie
+        they starred in together, so that neighbors touches each pair once.
+
+        Returns the size of the new arrays in bytes.
+        """
+        costar_offsets = array("q", [0])
+        costars = array("i")
+        costar_movies = array("i")
+        for person in range(len(self.person_ids)):
+            witnesses = self.witnesses(person)
+            costars.extend(witnesses.keys())
+            costar_movies.extend(witnesses.values())
+            costar_offsets.append(len(costars))
+
+        self.costar_offsets = costar_offsets
+        self.costars = costars
+        self.costar_movies = costar_movies
+        return sum(len(values) * values.itemsize for values in (costar_offsets, costars, costar_movies))
+
+    def witnesses(self, person):
+        """Returns a dictionary of person's co-stars to the first movie they starred in together."""
+        witnesses = {}
+        for movie in self.movies_for(person):
+            for star in self.stars_for(movie):
+                if star != person and star not in witnesses:
+                    witnesses[star] = movie
+        return witnesses
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people who starred with person,
+        including person themself, like degrees.neighbors_for_person.
+
+        Once build_costars has run, returns each co-star once instead
+        (without person themself).
+        """
+        if self.costars is not None:
+            start, end = self.costar_offsets[person], self.costar_offsets[person + 1]
+            return zip(self.costar_movies[start:end], self.costars[start:end])
+
+        pairs = []
+        for movie in self.movies_for(person):
+            pairs.extend(zip(repeat(movie), self.stars_for(movie)))
+        return pairs
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in self.neighbors(self.person_index(person_id))}
+
+    def bfs_tree(self, source):
+        """
+        Returns the breadth-first search tree of everyone reachable from the
+        source person index.
+        """
+        return ArrayTree(self, source)
+
+    def path_ids(self, path):
+        """Translates a path of (movie, person) indices into IMDB ids."""
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+class ArrayTree():
+    """
+    Breadth-first search tree over a Graph's person indices, stored as two
+    arrays: the parent of each person and the movie linking them (-1 for
+    people not reached).
+
+    Like the dictionary trees in degrees, get(person) returns the
+    (movie, parent) step back towards the source, or None for the source.
+    """
+
+    def __init__(self, graph, source):
+        self.source = source
+        self.parents = array("i", repeat(-1, len(graph.person_ids)))
+        self.movies = array("i", repeat(-1, len(graph.person_ids)))
+        self.parents[source] = source
+
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            for movie in graph.movies_for(person):
+                for neighbor in graph.stars_for(movie):
+                    if self.parents[neighbor] == -1:
+                        self.parents[neighbor] = person
+                        self.movies[neighbor] = movie
+                        frontier.append(neighbor)
+
+    def __contains__(self, person):
+        return self.parents[person] != -1
+
+    def get(self, person):
+        if person == self.source or self.parents[person] == -1:
+            return None
+        return self.movies[person], self.parents[person]
+
+    @property
+    def nbytes(self):
+        return (len(self.parents) * self.parents.itemsize
+                + len(self.movies) * self.movies.itemsize)
+
+
+def spliced(offsets, values, rows, n_rows):
+    """
+    Returns the (offsets, values) of a CSR adjacency of n_rows rows (at
+    least as many as before) where each row in rows gets that list of
+    values and every other row keeps its slice, copied in runs.
+    """
+    old_rows = len(offsets) - 1
+    end = offsets[old_rows]
+    new_offsets = array("q")
+    new_values = array(item_type(values))
+    done = position = shift = 0
+    for row in sorted(rows):
+        if row < old_rows:
+            extend_shifted(new_offsets, offsets[done:row + 1], shift)
+            start, stop = offsets[row], offsets[row + 1]
+        else:
+            extend_shifted(new_offsets, offsets[done:old_rows + 1], shift)
+            new_offsets.extend(repeat(end + shift, row + 1 - max(done, old_rows + 1)))
+            start = stop = end
+        extend_shifted(new_values, values[position:start], 0)
+        new_values.extend(rows[row])
+        shift += len(rows[row]) - (stop - start)
+        done, position = row + 1, stop
+    extend_shifted(new_offsets, offsets[done:], shift)
+    new_offsets.extend(repeat(end + shift, n_rows + 1 - max(done, old_rows + 1)))
+    extend_shifted(new_values, values[position:], 0)
+    return new_offsets, new_values
+
+
+def extend_shifted(target, values, shift):
+    """Appends values (an array or a snapshot's memoryview) to target, each plus shift."""
+    if shift:
+        target.extend(value + shift for value in values)
+    else:
+        target.frombytes(memoryview(values).cast("B"))
+
+
+def inserted(order, removed, added, key):
+    """
+    Returns a copy of order, a list of indices sorted by key, without the
+    indices in removed and with those in added put in their place.
+    """
+    copy = array("i")
+    extend_shifted(copy, order, 0)
+    order = copy
+    for i in removed:
+        order.remove(i)
+    for i in sorted(added, key=key):
+        order.insert(bisect_right(order, key(i), key=key), i)
+    return order
+
+
+def item_type(values):
+    """Returns the item type of an array, or of a memoryview cast from a snapshot."""
+    return values.format if isinstance(values, memoryview) else values.typecode
+
+
+def source_stamps(directory):
+    """
+    Returns the size and modification time of each CSV file in directory,
+    which a snapshot must match to be used.
+    """
+    stamps = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamps[name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+class PeopleView(Mapping):
+    """Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        person = self.graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": self.graph.person_names[person],
+            "birth": self.graph.person_births[person],
+            "movies": {self.graph.movie_ids[movie] for movie in self.graph.movies_for(person)}
+        }
+
+    def __contains__(self, person_id):
+        return self.graph.person_index(person_id) is not None
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        movie = self.graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": self.graph.movie_titles[movie],
+            "year": self.graph.movie_years[movie],
+            "stars": {self.graph.person_ids[person] for person in self.graph.stars_for(movie)}
+        }
+
+    def __contains__(self, movie_id):
+        return self.graph.movie_index(movie_id) is not None
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """Maps lowercase names to a set of corresponding person_ids."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        people = self.graph.people_named(name)
+        if not people:
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in people}
+
+    def __contains__(self, name):
+        return len(self.graph.people_named(name)) > 0
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self.graph.person_names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,205 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+
+# Most typos fuzzy search tolerates
+MAX_EDITS = 2
+
+# Segments each name is split into for fuzzy search, so a match keeps at least SEGMENTS - MAX_EDITS of them
+SEGMENTS = MAX_EDITS + 2
+
+
+class NameIndex():
+    """
+    Index of people's names for prefix completion and typo-tolerant search.
+
+    Each name is stored once as an entry, numbered in the order it was
+    added. order lists the entries sorted by lowercased name, so every name
+    with a given prefix is one contiguous run found by binary search.
+
+    Fuzzy search splits every name into SEGMENTS pieces and indexes the
+    entries by the name's length, the piece's number and its text, built the
+    first time it is needed. Each edit touches at most one piece, so a name
+    within k edits of the query keeps SEGMENTS - k pieces intact, each found
+    in the query no more than k letters from where it sits in the name.
+    """
+
+    def __init__(self, pairs):
+        """
+        Builds the index from (name, person_id) pairs.
+        """
+        self.names = []
+        self.ids = []
+        for name, person_id in pairs:
+            self.names.append(name)
+            self.ids.append(person_id)
+        self.keys = [name.lower() for name in self.names]
+        self.order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.segments = None
+
+    def add(self, name, person_id):
+        """Adds a name to the index, keeping the segment index up to date if built."""
+        entry = len(self.keys)
+        self.names.append(name)
+        self.ids.append(person_id)
+        self.keys.append(name.lower())
+        insort(self.order, entry, key=self.keys.__getitem__)
+        if self.segments is not None:
+            self.index_segments(entry)
+
+    def run(self, key):
+        """Yields the entries whose lowercased name starts with key, in order."""
+        i = bisect_left(self.order, key, key=self.keys.__getitem__)
+        while i < len(self.order) and self.keys[self.order[i]].startswith(key):
+            yield self.order[i]
+            i += 1
+
+    def exact(self, name):
+        """Returns the person_ids whose name matches name, ignoring case."""
+        key = name.lower()
+        return [self.ids[entry] for entry in self.run(key) if self.keys[entry] == key]
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit (name, person_id) pairs whose name starts with
+        prefix, ignoring case, in alphabetical order.
+        """
+        matches = []
+        for entry in self.run(prefix.lower()):
+            if len(matches) == limit:
+                break
+            matches.append((self.names[entry], self.ids[entry]))
+        return matches
+
+    def search(self, query, limit=10, max_edits=MAX_EDITS):
+        """
+        Returns up to limit (name, person_id) pairs whose name is within
+        max_edits insertions, deletions or substitutions of query, ignoring
+        case, closest first. max_edits is at most MAX_EDITS.
+
+        Short queries allow fewer edits (one per four letters), since almost
+        every short name is a couple of edits from any other.
+        """
+        if self.segments is None:
+            self.build_segments()
+
+        key = query.lower()
+        max_edits = min(max_edits, MAX_EDITS, len(key) // 4)
+
+        # for each length a match could have, count the segments of each name
+        # found among the query's substrings that start at most max_edits away
+        # (from either end, as edits on one side shift the other)
+        counts = Counter()
+        for length in range(max(len(key) - max_edits, 0), len(key) + max_edits + 1):
+            shift = len(key) - length
+            for number, (position, size) in enumerate(segments(length)):
+                index = self.segments.get((length, number))
+                if index is None:
+                    continue
+                starts = range(max(position - max_edits, position + shift - max_edits, 0),
+                               min(position + max_edits, position + shift + max_edits, len(key) - size) + 1)
+                texts = {key[start:start + size] for start in starts}
+                counts.update(chain.from_iterable(index.get(text, ()) for text in texts))
+
+        masks = letter_masks(key)
+        matches = []
+        for i, count in counts.items():
+            if count < SEGMENTS - max_edits:
+                continue
+            edits = bounded_distance(masks, len(key), self.keys[i], max_edits)
+            if edits <= max_edits:
+                matches.append((edits, self.keys[i], i))
+        matches.sort()
+        return [(self.names[i], self.ids[i]) for _, _, i in matches[:limit]]
+
+    def build_segments(self):
+        """Indexes each name under each of its segments."""
+        self.segments = {}
+        for entry in range(len(self.keys)):
+            self.index_segments(entry)
+
+    def index_segments(self, entry):
+        key = self.keys[entry]
+        for number, (position, size) in enumerate(segments(len(key))):
+            index = self.segments.setdefault((len(key), number), {})
+            text = key[position:position + size]
+            if text not in index:
+                index[text] = array("i")
+            index[text].append(entry)
+
+
+def segments(length):
+    """
+    Returns the (position, size) of the SEGMENTS pieces a name of the given
+    length is split into, as evenly as possible.
+    """
+    size, longer = divmod(length, SEGMENTS)
+    shorter = SEGMENTS - longer
+    return [(number * size + max(number - shorter, 0), size + (number >= shorter))
+            for number in range(SEGMENTS)]
+
+
+def letter_masks(key):
+    """Returns, for each letter of key, the bitmask of the positions it is at."""
+    masks = {}
+    for i, letter in enumerate(key):
+        masks[letter] = masks.get(letter, 0) | 1 << i
+    return masks
+
+
+def bounded_distance(masks, length, b, limit):
+    """
+    Returns the Levenshtein distance between the key of length `length`
+    whose letter_masks are masks and b, or limit + 1 as soon as it is
+    certain to be more than limit.
+
+    Uses Myers' bit-parallel algorithm: bit i of VP and VN says whether
+    the distance goes up or down between rows i and i + 1 of the current
+    column, so each letter of b updates a whole column in a few operations.
+    """
+    if abs(length - len(b)) > limit:
+        return limit + 1
+    if not length:
+        return len(b)
+    full = (1 << length) - 1
+    last = 1 << length - 1
+    up, down = full, 0
+    distance = length
+    for j, letter in enumerate(b, start=1):
+        equal = masks.get(letter, 0)
+        x = equal | down
+        diagonal = ((equal & up) + up ^ up) | equal
+        right_up = down | ~(diagonal | up) & full
+        right_down = up & diagonal
+        if right_up & last:
+            distance += 1
+        elif right_down & last:
+            distance -= 1
+
+        # the rest of b can bring the distance down by at most one per letter
+        if distance - (len(b) - j) > limit:
+            return limit + 1
+        right_up = (right_up << 1 | 1) & full
+        right_down = right_down << 1 & full
+        up = right_down | ~(x | right_up) & full
+        down = right_up & x
+    return distance
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b, or limit + 1 as soon
+    as it is certain to be more than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, start=1):
+        current = [i]
+        for j, y in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
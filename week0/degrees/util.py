@@ -1,3 +1,6 @@
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +39,139 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier backed by a deque, with a count of the states it
+    holds so that add, remove and contains_state are all O(1).
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self._forget(self.frontier.pop())
+
+    def _forget(self, node):
+        """Drops one occurrence of the node's state from the state counts."""
+        count = self.states[node.state]
+        if count == 1:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count - 1
+        return node
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self._forget(self.frontier.popleft())
+
+
+class TreeCache():
+    """
+    Least recently used cache of breadth-first search trees keyed by their
+    source, holding at most max_bytes worth of trees.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()
+        self.bytes = 0
+
+    def get(self, source):
+        """Returns the tree for source, or None if it is not cached."""
+        if source not in self.trees:
+            return None
+        self.trees.move_to_end(source)
+        return self.trees[source][0]
+
+    def put(self, source, tree, size):
+        """
+        Caches tree, which takes size bytes, evicting the least recently used
+        trees to make room. Trees larger than the whole cache are not kept.
+        """
+        if source in self.trees:
+            self.bytes -= self.trees.pop(source)[1]
+        if size > self.max_bytes:
+            return
+        while self.bytes + size > self.max_bytes:
+            _, (_, evicted) = self.trees.popitem(last=False)
+            self.bytes -= evicted
+        self.trees[source] = (tree, size)
+        self.bytes += size
+
+    def clear(self):
+        self.trees.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.trees)
+
+
+class DisjointSet():
+    """
+    Union-find over hashable items, with union by size and path halving.
+    Items are added the first time they are seen.
+    """
+
+    def __init__(self):
+        self.parents = {}
+        self.sizes = {}
+
+    def find(self, item):
+        """Returns the representative item of item's set."""
+        if item not in self.parents:
+            self.parents[item] = item
+            self.sizes[item] = 1
+            return item
+        while self.parents[item] != item:
+            self.parents[item] = self.parents[self.parents[item]]
+            item = self.parents[item]
+        return item
+
+    def union(self, a, b):
+        """Merges the sets containing a and b, returning the new representative."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.sizes[a] < self.sizes[b]:
+            a, b = b, a
+        self.parents[b] = a
+        self.sizes[a] += self.sizes.pop(b)
+        return a
+
+    def labels(self, items):
+        """
+        Returns a dictionary numbering the set of each item, in order of first
+        appearance, and a list of how many of the items are in each set.
+        """
+        numbers = {}
+        labels = {}
+        counts = []
+        for item in items:
+            root = self.find(item)
+            if root not in numbers:
+                numbers[root] = len(counts)
+                counts.append(0)
+            labels[item] = numbers[root]
+            counts[numbers[root]] += 1
+        return labels, counts
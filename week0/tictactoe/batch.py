@@ -0,0 +1,67 @@
+"""
+Evaluates many Tic Tac Toe boards at once with NumPy.
+
+Boards are rows of an (N, cells) integer array, cell i * cols + j holding 1
+for X, -1 for O and 0 for empty. Summing each board's cells along every
+line gives k or -k exactly where a player has completed it, so winners,
+terminal flags, utilities and legal moves for all N boards come from a few
+array operations.
+"""
+
+import numpy as np
+
+from bitboard import lines
+
+
+def line_cells(rows=3, cols=3, k=3):
+    """
+    Returns an (L, k) array of the cells in each of the board's L lines of k.
+    """
+    return np.array([[cell for cell in range(rows * cols) if line >> cell & 1] for line in lines(rows, cols, k)],
+                    dtype=np.intp)
+
+
+def to_array(boards, x="X", o="O"):
+    """
+    Returns the (N, cells) array for a list of list-of-lists boards.
+    """
+    flat = np.array([[cell for row in board for cell in row] for board in boards], dtype=object)
+    return (flat == x).astype(np.int8) - (flat == o).astype(np.int8)
+
+
+def evaluate(boards, rows=3, cols=3, k=3):
+    """
+    Returns (winners, terminal, utilities, legal) for an (N, cells) array
+    of boards: each board's winner (1 X, -1 O, 0 none), whether the game is
+    over, its utility (the same as the winner), and an (N, cells) mask of the
+    cells that can be played (none once the game is over).
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    sums = boards[:, line_cells(rows, cols, k)].sum(axis=2, dtype=np.int16)
+    x_won = (sums == k).any(axis=1)
+    o_won = (sums == -k).any(axis=1)
+    winners = np.where(x_won, 1, np.where(o_won, -1, 0)).astype(np.int8)
+    empty = boards == 0
+    terminal = x_won | o_won | ~empty.any(axis=1)
+    legal = empty & ~terminal[:, None]
+    return winners, terminal, winners.copy(), legal
+
+
+def winners(boards, rows=3, cols=3, k=3):
+    """Returns each board's winner: 1 for X, -1 for O, 0 for none."""
+    return evaluate(boards, rows, cols, k)[0]
+
+
+def terminal(boards, rows=3, cols=3, k=3):
+    """Returns True for each board whose game is over."""
+    return evaluate(boards, rows, cols, k)[1]
+
+
+def utility(boards, rows=3, cols=3, k=3):
+    """Returns each board's utility: 1 if X has won, -1 if O has won, 0 otherwise."""
+    return evaluate(boards, rows, cols, k)[2]
+
+
+def legal_moves(boards, rows=3, cols=3, k=3):
+    """Returns the (N, cells) mask of the moves that can be played on each board."""
+    return evaluate(boards, rows, cols, k)[3]
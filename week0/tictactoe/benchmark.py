@@ -0,0 +1,102 @@
+"""
+Benchmarks the bitboard engine against the list-of-lists board it replaced,
+searching against looking moves up in the solutions file, and batch
+evaluation with NumPy against calling the per-board functions.
+
+Usage: python benchmark.py
+"""
+
+import copy
+import random
+import time
+
+import batch
+import bitboard
+import tictactoe as ttt
+
+
+def timed(function, *args):
+    """Returns the result of calling function, and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def list_player(board):
+    """player() as it was on list boards: compare to the empty board, then count every cell."""
+    if board == ttt.initial_state():
+        return ttt.X
+    x = sum(row.count(ttt.X) for row in board)
+    o = sum(row.count(ttt.O) for row in board)
+    return ttt.O if o < x else ttt.X
+
+
+def list_result(board, action):
+    """result() as it was on list boards, deep copying the board."""
+    board_ = copy.deepcopy(board)
+    board_[action[0]][action[1]] = list_player(board)
+    return board_
+
+
+def list_winner(board):
+    """winner() as it was on list boards, comparing rows, columns and diagonals."""
+    for i in range(3):
+        if board[i] == [ttt.X, ttt.X, ttt.X]:
+            return ttt.X
+        if board[i] == [ttt.O, ttt.O, ttt.O]:
+            return ttt.O
+        if board[0][i] == board[1][i] == board[2][i] and board[0][i] != ttt.EMPTY:
+            return board[0][i]
+    if board[0][0] == board[1][1] == board[2][2] and board[0][0] != ttt.EMPTY:
+        return board[0][0]
+    if board[0][2] == board[1][1] == board[2][0] and board[0][2] != ttt.EMPTY:
+        return board[0][2]
+    return None
+
+
+def list_nodes(board):
+    """Returns the number of nodes in the full game tree below a list board."""
+    if list_winner(board) or all(cell != ttt.EMPTY for row in board for cell in row):
+        return 1
+    return 1 + sum(list_nodes(list_result(board, (i, j)))
+                   for i, row in enumerate(board) for j, cell in enumerate(row) if cell == ttt.EMPTY)
+
+
+def bitboard_nodes(x, o):
+    """Returns the number of nodes in the full game tree below a bitboard position."""
+    if bitboard.terminal(x, o):
+        return 1
+    return 1 + sum(bitboard_nodes(*bitboard.play(x, o, cell)) for cell in bitboard.moves(x, o))
+
+
+def main():
+    print("full game tree:")
+    nodes, seconds = timed(list_nodes, ttt.initial_state())
+    print(f"    lists     {nodes} nodes {seconds:7.2f}s  {nodes / seconds:10.0f} nodes/sec")
+    nodes, seconds = timed(bitboard_nodes, 0, 0)
+    print(f"    bitboards {nodes} nodes {seconds:7.2f}s  {nodes / seconds:10.0f} nodes/sec")
+
+    print("minimax(initial_state()):")
+    ttt.table.clear()
+    _, cold = timed(bitboard.search_move, 0, 0)
+    print(f"    {bitboard.stats}")
+    _, warm = timed(bitboard.search_move, 0, 0)
+    print(f"    search cold {cold * 1000:7.2f} ms  warm {warm * 1000:7.3f} ms  ({len(ttt.table)} positions cached)")
+    if bitboard.solutions is not None:
+        _, lookup = timed(ttt.minimax, ttt.initial_state())
+        print(f"    solutions lookup {lookup * 1000:7.3f} ms")
+
+
+    print("winner/terminal/utility/legal moves:")
+    rng = random.Random(0)
+    boards = [[[rng.choice((ttt.X, ttt.O, ttt.EMPTY)) for _ in range(3)] for _ in range(3)] for _ in range(10000)]
+    _, seconds = timed(lambda: [(ttt.winner(board), ttt.terminal(board), ttt.utility(board), ttt.actions(board))
+                                for board in boards])
+    print(f"    per board {len(boards) / seconds:12.0f} boards/sec")
+    array = batch.to_array(boards * 100)
+    _, seconds = timed(batch.evaluate, array)
+    print(f"    batch     {len(array) / seconds:12.0f} boards/sec  ({len(array)} boards)")
+
+
+if __name__ == "__main__":
+    main()
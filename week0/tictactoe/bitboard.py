@@ -0,0 +1,346 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A position is a pair of integers (x, o), one bitmask per player, where bit
+3 * i + j is set if that player has a mark in cell (i, j). Making a move is
+a single OR, a win is a mask test against the 8 lines, and the player to
+move follows from counting the marks.
+
+Rotations and reflections of a position have the same value, so the
+transposition table and the solutions file store each position under its
+canonical form, the smallest of its 8 symmetric images.
+
+If solve.py has written the solutions file, every reachable position's
+optimal move is looked up in it instead of searched for.
+"""
+
+import math
+import os
+
+# Number of rows and columns, and the mask with every cell set
+SIZE = 3
+FULL = (1 << SIZE * SIZE) - 1
+
+# File holding the optimal move and value of every reachable position, written by solve.py
+SOLUTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solutions.bin")
+
+# Flag set on the solutions entries of reachable positions
+SOLVED = 0x80
+
+# Bytes per solutions file record: the position index (2 bytes, little endian) then its entry
+RECORD = 3
+
+# Kinds of value stored in the transposition table: the position's exact value,
+# or a bound on it left by a search that was pruned
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+
+def lines(rows, cols, k):
+    """
+    Returns the masks of every run of k cells in a row, column or diagonal
+    of a rows by cols board.
+    """
+    masks = []
+    for i in range(rows):
+        for j in range(cols):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if 0 <= end_i < rows and 0 <= end_j < cols:
+                    masks.append(sum(1 << (i + di * step) * cols + j + dj * step for step in range(k)))
+    return masks
+
+
+LINES = lines(SIZE, SIZE, SIZE)
+
+# WINS[mask] is True if the marks in mask complete a line
+WINS = [any(mask & line == line for line in LINES) for mask in range(FULL + 1)]
+
+# Cells in the order moves are tried: center, corners, then edges
+ORDER = sorted(range(SIZE * SIZE), key=lambda cell: abs(cell // SIZE - 1) + abs(cell % SIZE - 1))
+
+# TERNARY[mask] is mask's bits read as base 3 digits, to number positions from 0 to 3 ** 9 - 1
+TERNARY = [sum(3 ** cell for cell in range(SIZE * SIZE) if mask >> cell & 1) for mask in range(FULL + 1)]
+
+
+def symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a list
+    mapping every cell to the cell it moves to.
+    """
+    def rotate(i, j):
+        return j, SIZE - 1 - i
+
+    permutations = []
+    for reflect in (False, True):
+        for turns in range(4):
+            permutation = []
+            for cell in range(SIZE * SIZE):
+                i, j = divmod(cell, SIZE)
+                if reflect:
+                    j = SIZE - 1 - j
+                for _ in range(turns):
+                    i, j = rotate(i, j)
+                permutation.append(i * SIZE + j)
+            permutations.append(permutation)
+    return permutations
+
+
+SYMMETRIES = symmetries()
+
+# INVERSES[s] maps each cell of the transformed board back to the original
+INVERSES = [[permutation.index(cell) for cell in range(SIZE * SIZE)] for permutation in SYMMETRIES]
+
+# PERMUTED[s][mask] is mask with each of its cells moved by symmetry s
+PERMUTED = [[sum(1 << permutation[cell] for cell in range(SIZE * SIZE) if mask >> cell & 1)
+             for mask in range(FULL + 1)] for permutation in SYMMETRIES]
+
+
+def canonical(x, o):
+    """
+    Returns the canonical form of the position, the smallest (x, o) among
+    its symmetric images, and the index of the symmetry that produces it.
+    """
+    best = (x, o)
+    symmetry = 0
+    for s in range(1, len(PERMUTED)):
+        image = (PERMUTED[s][x], PERMUTED[s][o])
+        if image < best:
+            best = image
+            symmetry = s
+    return best, symmetry
+
+
+class TranspositionTable():
+    """
+    Remembers the values of positions already searched, so a position
+    reached again through a different order of moves, or a rotation or
+    reflection of one, is not searched again.
+
+    Each entry is a (value, bound) pair, the value being for the player to
+    move. A pruned search only knows a bound on the value: LOWER if the true
+    value is at least value (a move was good enough to cut off the search),
+    UPPER if it is at most value (no move reached the bottom of the window).
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, x, o):
+        """Returns the (value, bound) stored for the position or a symmetric one, or None."""
+        return self.entries.get(canonical(x, o)[0])
+
+    def put(self, x, o, value, bound):
+        self.entries[canonical(x, o)[0]] = (value, bound)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SearchStats():
+    """
+    Counts of the work done by one search: positions visited, cutoffs
+    (searches stopped early by alpha-beta pruning) and the deepest ply reached.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.max_depth = 0
+
+    def __repr__(self):
+        return f"SearchStats(nodes={self.nodes}, cutoffs={self.cutoffs}, max_depth={self.max_depth})"
+
+
+# Shared by every search, positions keep their value between searches
+table = TranspositionTable()
+
+# The work done by the last search, and each ply's moves that last caused cutoffs
+stats = SearchStats()
+killers = {}
+
+
+def index(x, o):
+    """Returns the position's number, each cell being a base 3 digit (0 empty, 1 X, 2 O)."""
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def pack(cell, value):
+    """
+    Returns the solutions entry for a position: the SOLVED flag, the value
+    plus one in bits 4 and 5, and the cell plus one (0 if the game is over)
+    in the low bits.
+    """
+    return SOLVED | (value + 1) << 4 | (0 if cell is None else cell + 1)
+
+
+def load_solutions(path=SOLUTIONS):
+    """
+    Returns the solutions in path as a dict from canonical position index
+    to entry, or None if the file has not been written.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) % RECORD:
+        return None
+    return {int.from_bytes(data[i:i + 2], "little"): data[i + 2] for i in range(0, len(data), RECORD)}
+
+
+def solved(x, o):
+    """
+    Returns the optimal (cell, value) of the position from the solutions
+    table, or None if there is no table or the position is not in it.
+    """
+    if solutions is None:
+        return None
+    position, symmetry = canonical(x, o)
+    entry = solutions.get(index(*position))
+    if entry is None:
+        return None
+
+    # the stored cell is on the canonical board, turn it back to this one
+    cell = (entry & 0xF) - 1
+    return (None if cell < 0 else INVERSES[symmetry][cell]), (entry >> 4 & 3) - 1
+
+
+solutions = load_solutions()
+
+
+def x_to_move(x, o):
+    """Returns True if it is X's turn, X moves first so when both have as many marks."""
+    return x.bit_count() <= o.bit_count()
+
+
+def moves(x, o):
+    """Returns the list of empty cells' bit indices, in order."""
+    empty = ~(x | o) & FULL
+    return [cell for cell in range(SIZE * SIZE) if empty >> cell & 1]
+
+
+def play(x, o, cell):
+    """Returns the position after the player to move marks cell."""
+    if x_to_move(x, o):
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def utility(x, o):
+    """Returns 1 if X has won, -1 if O has won, 0 otherwise."""
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
+def terminal(x, o):
+    """Returns True if either player has won or the board is full."""
+    return WINS[x] or WINS[o] or x | o == FULL
+
+
+def best_move(x, o):
+    """
+    Returns the cell that is optimal for the player to move, or None if the
+    game is over.
+    """
+    solution = solved(x, o)
+    if solution is not None:
+        stats.reset()
+        return solution[0]
+    return search_move(x, o)
+
+
+def search_move(x, o):
+    """
+    Returns the same cell as best_move, always found by searching, and
+    records the search's work in stats.
+    """
+    stats.reset()
+    killers.clear()
+    if terminal(x, o):
+        return None
+
+    mover, other = (x, o) if x_to_move(x, o) else (o, x)
+    alpha = -1
+    best_value = -math.inf
+    best_cell = None
+    for cell in ordered(mover | other, 0):
+        value = -negamax(other, mover | 1 << cell, -1, -alpha, 1)
+        if value > best_value:
+            best_value = value
+            best_cell = cell
+        alpha = max(alpha, value)
+
+        # nothing beats a win
+        if alpha >= 1:
+            break
+    return best_cell
+
+
+def ordered(marks, ply):
+    """
+    Returns the empty cells in the order to search them: the killer moves
+    that caused cutoffs at this ply before, then the center, corners and
+    edges.
+    """
+    first = [cell for cell in killers.get(ply, ()) if not marks >> cell & 1]
+    return first + [cell for cell in ORDER if not marks >> cell & 1 and cell not in first]
+
+
+def negamax(mover, other, alpha, beta, ply):
+    """
+    Returns the value of the position for the player to move (1 win, 0
+    draw, -1 loss), or a bound on it if it is outside (alpha, beta).
+    """
+    stats.nodes += 1
+    stats.max_depth = max(stats.max_depth, ply)
+
+    # the player who just moved may have won
+    if WINS[other]:
+        return -1
+    if mover | other == FULL:
+        return 0
+
+    # narrow the window by what an earlier search found, or return if that settles it
+    original_alpha = alpha
+    entry = table.get(mover, other)
+    if entry is not None:
+        value, bound = entry
+        if bound == EXACT:
+            return value
+        if bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    best_value = -math.inf
+    for cell in ordered(mover | other, ply):
+        value = -negamax(other, mover | 1 << cell, -beta, -alpha, ply + 1)
+        best_value = max(best_value, value)
+        alpha = max(alpha, value)
+        if alpha >= beta:
+
+            # remember the move that cut off, to try it first in this ply's other positions
+            stats.cutoffs += 1
+            cells = killers.setdefault(ply, [])
+            if cell not in cells:
+                cells.insert(0, cell)
+                del cells[2:]
+            break
+
+    if best_value <= original_alpha:
+        bound = UPPER
+    elif best_value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    table.put(mover, other, best_value, bound)
+    return best_value
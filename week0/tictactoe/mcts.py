@@ -0,0 +1,179 @@
+"""
+Monte Carlo Tree Search player, for boards too big to search exhaustively.
+
+Usage: python mcts.py [--playouts=N] [--workers=N] [rows cols k]
+
+Plays through the same actions/result/terminal/utility functions as
+minimax. The playout budget is split between worker processes that each
+grow their own tree from the position (root parallelization); their visit
+counts for each move are then added up, and the most visited move is played.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+# Default number of playouts per move, over all workers
+PLAYOUTS = 2000
+
+# Exploration constant of the UCT formula
+EXPLORATION = math.sqrt(2)
+
+
+class Node():
+    """
+    A position in the search tree, with the number of playouts through it
+    and their total reward for the player who made the move leading here.
+    """
+
+    def __init__(self, board, parent=None, action=None):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = list(ttt.actions(board)) if not ttt.terminal(board) else []
+        self.mover = None if parent is None else ttt.player(parent.board)
+        self.visits = 0
+        self.reward = 0.0
+
+    def select(self):
+        """Returns the child with the highest UCT score."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.reward / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+class PlayoutStats():
+    """
+    The playouts of the last search, how long they took and how many
+    worker processes ran them.
+    """
+
+    def __init__(self):
+        self.playouts = 0
+        self.seconds = 0.0
+        self.workers = 0
+
+    @property
+    def rate(self):
+        return self.playouts / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return (f"PlayoutStats(playouts={self.playouts}, seconds={self.seconds:.3f}, "
+                f"workers={self.workers}, rate={self.rate:.0f}/sec)")
+
+
+# The work done by the last call to best_action
+stats = PlayoutStats()
+
+
+def best_action(board, playouts=PLAYOUTS, workers=None, seed=None):
+    """
+    Returns the action with the most visits after `playouts` playouts from
+    the board, split between `workers` processes (default one per CPU), or
+    None if the game is over.
+    """
+    if playouts < 1:
+        raise ValueError("need at least one playout")
+    if ttt.terminal(board):
+        return None
+    workers = min(workers or os.cpu_count(), playouts)
+    rng = random.Random(seed)
+    shares = [playouts // workers + (i < playouts % workers) for i in range(workers)]
+    tasks = [(board, share, rng.randrange(2 ** 32), (ttt.ROWS, ttt.COLS, ttt.K)) for share in shares]
+
+    start = time.perf_counter()
+    if workers == 1:
+        trees = [search(*tasks[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            trees = pool.starmap(search, tasks)
+    stats.seconds = time.perf_counter() - start
+    stats.playouts = playouts
+    stats.workers = workers
+
+    # merge the roots of every worker's tree
+    visits = {}
+    for tree in trees:
+        for action, count in tree.items():
+            visits[action] = visits.get(action, 0) + count
+    return max(visits, key=visits.get)
+
+
+def search(board, playouts, seed, size=None):
+    """
+    Grows a tree from the board with `playouts` playouts, returning the
+    number of visits of each of the root's actions.
+
+    size is the (rows, cols, k) to configure tictactoe with, for workers that
+    do not share this process' settings.
+    """
+    if size is not None and size != (ttt.ROWS, ttt.COLS, ttt.K):
+        ttt.configure(*size)
+    rng = random.Random(seed)
+    root = Node(board)
+    for _ in range(playouts):
+
+        # selection: follow the best children down to a node with moves not yet tried
+        node = root
+        while not node.untried and node.children:
+            node = node.select()
+
+        # expansion: add one untried move as a child
+        if node.untried:
+            action = node.untried.pop(rng.randrange(len(node.untried)))
+            child = Node(ttt.result(node.board, action), node, action)
+            node.children.append(child)
+            node = child
+
+        # simulation: play randomly to the end
+        utility = playout(node.board, rng)
+
+        # backpropagation: credit each move on the path from the mover's point of view
+        while node is not None:
+            node.visits += 1
+            if node.mover is not None:
+                node.reward += (1 + (utility if node.mover == ttt.X else -utility)) / 2
+            node = node.parent
+
+    return {child.action: child.visits for child in root.children}
+
+
+def playout(board, rng):
+    """Returns the utility at the end of a game of random moves from board."""
+    while not ttt.terminal(board):
+        board = ttt.result(board, rng.choice(list(ttt.actions(board))))
+    return ttt.utility(board)
+
+
+def main():
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    playouts, workers = PLAYOUTS, os.cpu_count()
+    for option in options:
+        name, _, value = option.partition("=")
+        if name in ("--playouts", "--workers") and value.isdigit() and int(value) > 0:
+            if name == "--playouts":
+                playouts = int(value)
+            else:
+                workers = int(value)
+        else:
+            arguments = None
+            break
+    if arguments is None or len(arguments) not in (0, 3) or not all(arg.isdigit() for arg in arguments):
+        sys.exit("Usage: python mcts.py [--playouts=N] [--workers=N] [rows cols k]")
+    if arguments:
+        ttt.configure(*(int(arg) for arg in arguments))
+
+    action = best_action(ttt.initial_state(), playouts, workers, seed=0)
+    print(f"{ttt.ROWS}x{ttt.COLS}, {ttt.K} in a row: plays {action}")
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
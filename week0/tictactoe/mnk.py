@@ -0,0 +1,223 @@
+"""
+Engine for m,n,k games: Tic Tac Toe on a board of any size, won by the
+first player to get k marks in a row.
+
+Boards too big to search to the end are searched by iterative deepening:
+negamax with alpha-beta pruning to depth 1, 2, 3, ... until the time limit,
+scoring unfinished positions with a heuristic. The best move of the deepest
+finished search is played.
+
+Positions are (x, o) bitmasks as in bitboard.py, with bit i * cols + j for
+cell (i, j).
+"""
+
+import math
+import time
+
+from bitboard import EXACT, LOWER, UPPER, SearchStats, lines, x_to_move
+
+# Value of a win, less the number of marks on the board, so faster wins score higher
+WIN = 10 ** 9
+
+# Cells this far from a mark (in rows or columns) are the only moves considered
+NEIGHBORHOOD = 2
+
+# Default seconds to think about a move
+TIME_LIMIT = 1.0
+
+# Nodes searched between checks of the clock and the stop flag
+CHECK_EVERY = 1024
+
+
+class OutOfTime(Exception):
+    """Raised inside a search when its deadline has passed or it was asked to stop."""
+
+
+class Game():
+    """
+    The lines and move orders of one board size and win length, and the
+    transposition table shared by every search on it.
+    """
+
+    def __init__(self, rows, cols, k):
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError("win length must fit on the board")
+        self.rows, self.cols, self.k = rows, cols, k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+        self.lines = lines(rows, cols, k)
+
+        # the lines through each cell, to check only those after a move there
+        self.lines_through = [[line for line in self.lines if line >> cell & 1] for cell in range(self.cells)]
+
+        # cells from the center outwards, the order moves are tried in
+        center = ((rows - 1) / 2, (cols - 1) / 2)
+        self.order = sorted(range(self.cells),
+                            key=lambda cell: abs(cell // cols - center[0]) + abs(cell % cols - center[1]))
+
+        # the cells around each cell, to only consider moves near those already made
+        self.near = []
+        for cell in range(self.cells):
+            i, j = divmod(cell, cols)
+            self.near.append(sum(1 << a * cols + b
+                                 for a in range(max(0, i - NEIGHBORHOOD), min(rows, i + NEIGHBORHOOD + 1))
+                                 for b in range(max(0, j - NEIGHBORHOOD), min(cols, j + NEIGHBORHOOD + 1))))
+
+        # the heuristic's score for a line holding only one player's marks, by how many
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # maps (mover, other) to (depth, value, bound, best cell)
+        self.table = {}
+        self.killers = {}
+        self.stats = SearchStats()
+        self.depth = 0
+        self.deadline = math.inf
+        self.stop = None
+
+    def won(self, mask):
+        """Returns True if the marks in mask complete a line."""
+        return any(mask & line == line for line in self.lines)
+
+    def wins_at(self, mask, cell):
+        """Returns True if a line through cell is complete in mask."""
+        return any(mask & line == line for line in self.lines_through[cell])
+
+    def terminal(self, x, o):
+        return self.won(x) or self.won(o) or x | o == self.full
+
+    def utility(self, x, o):
+        """Returns 1 if X has won, -1 if O has won, 0 otherwise."""
+        return 1 if self.won(x) else -1 if self.won(o) else 0
+
+    def evaluate(self, mover, other):
+        """
+        Returns the heuristic value of a position for the player to move:
+        the lines they could still complete, weighted by how many of their
+        marks each holds, less the same for their opponent.
+        """
+        score = 0
+        for line in self.lines:
+            mine = line & mover
+            theirs = line & other
+            if mine and not theirs:
+                score += self.weights[mine.bit_count()]
+            elif theirs and not mine:
+                score -= self.weights[theirs.bit_count()]
+        return score
+
+    def candidates(self, mover, other):
+        """
+        Returns the empty cells worth trying, those near a mark (or every
+        empty cell if none are), center first.
+        """
+        marks = mover | other
+        empty = ~marks & self.full
+        near = 0
+        remaining = marks
+        while remaining:
+            low = remaining & -remaining
+            near |= self.near[low.bit_length() - 1]
+            remaining ^= low
+        allowed = empty & near or empty
+        return [cell for cell in self.order if allowed >> cell & 1]
+
+    def ordered(self, mover, other, best, ply):
+        """
+        Returns the candidate cells in the order to search them: the best
+        cell from an earlier search, then this ply's killer moves (which caused
+        cutoffs in sibling positions), then the rest center first.
+        """
+        cells = self.candidates(mover, other)
+        first = [best] if best is not None else []
+        for killer in self.killers.get(ply, ()):
+            if killer != best and killer in cells:
+                first.append(killer)
+        return first + [cell for cell in cells if cell not in first]
+
+    def best_move(self, x, o, time_limit=TIME_LIMIT, stop=None):
+        """
+        Returns the best cell for the player to move, searching deeper
+        until time_limit seconds have passed or the game is solved, or None
+        if the game is over.
+
+        stop is an optional threading.Event another thread can set to end
+        the search early, with the best move found so far.
+        """
+        if self.terminal(x, o):
+            return None
+        mover, other = (x, o) if x_to_move(x, o) else (o, x)
+        self.deadline = time.perf_counter() + time_limit
+        self.stop = stop
+        self.stats.reset()
+        self.depth = 0
+        self.killers = {}
+
+        empty = self.cells - (x | o).bit_count()
+        best = self.ordered(mover, other, None, 0)[0]
+        for depth in range(1, empty + 1):
+            try:
+                value = self.negamax(mover, other, depth, -math.inf, math.inf, 0)
+            except OutOfTime:
+                break
+            best = self.table[(mover, other)][3]
+            self.depth = depth
+
+            # stop once a win or loss is certain
+            if abs(value) > WIN - self.cells - 1:
+                break
+        return best
+
+    def negamax(self, mover, other, depth, alpha, beta, ply):
+        """
+        Returns the value of the position for the player to move, searching
+        depth moves ahead, or a bound on it outside (alpha, beta).
+        """
+        self.stats.nodes += 1
+        self.stats.max_depth = max(self.stats.max_depth, ply)
+        if self.stats.nodes % CHECK_EVERY == 0 and (
+                time.perf_counter() > self.deadline or self.stop is not None and self.stop.is_set()):
+            raise OutOfTime
+
+        marks = mover | other
+        if marks == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(mover, other)
+
+        # use an earlier search of this position that went at least as deep
+        entry = self.table.get((mover, other))
+        best_cell = None
+        if entry is not None:
+            entry_depth, value, bound, best_cell = entry
+            if entry_depth >= depth:
+                if bound == EXACT or (bound == LOWER and value >= beta) or (bound == UPPER and value <= alpha):
+                    return value
+
+        original_alpha = alpha
+        best_value = -math.inf
+        for cell in self.ordered(mover, other, best_cell, ply):
+            moved = mover | 1 << cell
+            if self.wins_at(moved, cell):
+                value = WIN - marks.bit_count() - 1
+            else:
+                value = -self.negamax(other, moved, depth - 1, -beta, -alpha, ply + 1)
+            if value > best_value:
+                best_value = value
+                best_cell = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self.stats.cutoffs += 1
+                killers = self.killers.setdefault(ply, [])
+                if cell not in killers:
+                    killers.insert(0, cell)
+                    del killers[2:]
+                break
+
+        if best_value >= beta:
+            bound = LOWER
+        elif best_value <= original_alpha:
+            bound = UPPER
+        else:
+            bound = EXACT
+        self.table[(mover, other)] = (depth, best_value, bound, best_cell)
+        return best_value
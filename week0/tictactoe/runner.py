@@ -3,6 +3,13 @@ import sys
 import time
 
 import tictactoe as ttt
+from worker import SearchWorker
+
+# Optional board size and win length: python runner.py [rows cols k]
+if len(sys.argv) not in (1, 4) or not all(arg.isdigit() for arg in sys.argv[1:]):
+    sys.exit("Usage: python runner.py [rows cols k]")
+if len(sys.argv) == 4:
+    ttt.configure(*(int(arg) for arg in sys.argv[1:]))
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,12 +22,21 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Tiles shrink to fit boards bigger than 3x3, and the marks with them
+tile_size = min(80, 300 // max(ttt.ROWS, ttt.COLS))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
 board = ttt.initial_state()
 ai_turn = False
 
+# Searches for the computer's moves in the background, so the window stays responsive
+worker = SearchWorker()
+
+# Seconds the computer waits before moving, so its moves don't appear instantly
+AI_DELAY = 0.5
+
 while True:
 
     for event in pygame.event.get():
@@ -67,13 +83,13 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        rows, cols = ttt.ROWS, ttt.COLS
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -108,22 +124,27 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, without waiting for the search
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if not ai_turn:
+                worker.request(board)
+                ai_started = time.time()
+                ai_turn = True
+            move = worker.poll(board)
+            if move is not None and time.time() - ai_started >= AI_DELAY:
                 board = ttt.result(board, move)
                 ai_turn = False
-            else:
-                ai_turn = True
+
+                # start on the replies the user is likely to make
+                if not ttt.terminal(board):
+                    worker.speculate(board)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -142,5 +163,6 @@ while True:
                     user = None
                     board = ttt.initial_state()
                     ai_turn = False
+                    worker.cancel()
 
     pygame.display.flip()
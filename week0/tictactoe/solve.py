@@ -0,0 +1,47 @@
+"""
+Solves Tic Tac Toe, writing the optimal move and value of every position
+reachable from the empty board to the solutions file bitboard loads. Only
+canonical positions are written, the rest are rotations or reflections.
+
+Usage: python solve.py
+"""
+
+import bitboard
+
+
+def main():
+    solutions = solve()
+    with open(bitboard.SOLUTIONS, "wb") as f:
+        for position in sorted(solutions):
+            f.write(position.to_bytes(2, "little") + bytes([solutions[position]]))
+    print(f"Wrote {len(solutions)} positions to {bitboard.SOLUTIONS}")
+
+
+def solve():
+    """
+    Returns a dict from the index of each reachable canonical position to
+    its entry, packed by bitboard.pack with the move on the canonical board.
+    """
+    solutions = {}
+    frontier = [(0, 0)]
+    while frontier:
+        x, o = bitboard.canonical(*frontier.pop())[0]
+        if bitboard.index(x, o) in solutions:
+            continue
+        solutions[bitboard.index(x, o)] = bitboard.pack(bitboard.search_move(x, o), value(x, o))
+        if not bitboard.terminal(x, o):
+            frontier.extend(bitboard.play(x, o, cell) for cell in bitboard.moves(x, o))
+    return solutions
+
+
+def value(x, o):
+    """Returns the position's value for X with perfect play, searching with the widest window."""
+    if bitboard.terminal(x, o):
+        return bitboard.utility(x, o)
+    if bitboard.x_to_move(x, o):
+        return bitboard.negamax(x, o, -1, 1, 0)
+    return -bitboard.negamax(o, x, -1, 1, 0)
+
+
+if __name__ == "__main__":
+    main()
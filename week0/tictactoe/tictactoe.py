@@ -1,222 +1,154 @@
 """
 Tic Tac Toe Player
+
+The board is a list of lists for runner.py, the search itself runs on
+bitboards and these functions translate between the two. The classic 3x3
+game is solved perfectly by bitboard.py, other sizes set with configure()
+are searched by mnk.py within a time limit.
 """
 
-import math
-import copy
+import bitboard
+import mnk
+from bitboard import table
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Board size and the number in a row that wins
+ROWS = 3
+COLS = 3
+K = 3
+
+# The mnk.Game for the current size, or None for the classic game
+game = None
+
+
+def configure(rows=3, cols=3, k=3):
+    """
+    Sets the size of the board and the number of marks in a row that wins,
+    for every function here.
+    """
+    global ROWS, COLS, K, game
+    game = None if (rows, cols, k) == (3, 3, 3) else mnk.Game(rows, cols, k)
+    ROWS, COLS, K = rows, cols, k
+
 
 def initial_state():
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * COLS for _ in range(ROWS)]
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitmasks of the board, bit COLS * i + j being cell (i, j).
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << COLS * i + j
+            elif cell == O:
+                o |= 1 << COLS * i + j
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the board with X's marks on the bits of x and O's on the bits of o.
+    """
+    return [[X if x >> COLS * i + j & 1 else O if o >> COLS * i + j & 1 else EMPTY for j in range(COLS)]
+            for i in range(ROWS)]
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    
-    # if game just started, it is X's turn
-    if board == initial_state():
-        return X
-    
-    # variables to track the # of X's and O's on the board
-    x = 0
-    o = 0
-
-    # loop through rows and columns, count the X's and O's
-    for row in board:
-        for column in row:
-            if column == X: x += 1
-            elif column == O: o += 1
-    
-    return O if o < x else X
+    return X if bitboard.x_to_move(*encode(board)) else O
+
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    
-    # variable to track possible actions
-    actions_ = set()
-
-    # loop through rows and columns and add 
-    for i, row in enumerate(board):
-        for j, column in enumerate(row):
-            if column == EMPTY: actions_.add((i, j))
-    
-    return actions_
+    return {(i, j) for i, row in enumerate(board) for j, cell in enumerate(row) if cell == EMPTY}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    
-    # deep copy of board, to not change the original and making action a list to be able to access the row and column #s
-    board_ = copy.deepcopy(board)
-    action_ = list(action)
 
     # if action is not valid, raise exception
-    if board_[action_[0]][action_[1]] != EMPTY or (action[0] > 2 or action[0] < 0) or (action[1] > 2 or action[1] < 0):
+    i, j = action
+    if not (0 <= i < ROWS and 0 <= j < COLS) or board[i][j] != EMPTY:
         raise Exception("Invalid Action")
-    
-    # change the spot on the board to the player whose turn it is
-    board_[action_[0]][action_[1]] = player(board)
 
-    return board_
+    # mark the spot for the player whose turn it is, on a new board so the original doesn't change
+    return decode(*bitboard.play(*encode(board), COLS * i + j))
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    
-    for i in range(3):
-
-        # checking rows
-        if board[i] == [X, X, X]:
-            return X
-        if board[i] == [O, O, O]:
-            return O
-        
-        # checking columns
-        if board[0][i] == board[1][i] == board[2][i] and board[0][i] != EMPTY:
-            return X if board[0][i] == X else O
-        
-    # checking diagnols
-    if board[0][0] == board[1][1] == board[2][2] and board[0][0] != EMPTY:
-        return X if board[0][0] == X else O
-    if board[0][2] == board[1][1] == board[2][0] and board[0][2] != EMPTY:
-        return X if board[0][2] == X else O
-        
-
-    # if no winner, return None
-    return None
+    utility_ = utility(board)
+    return X if utility_ == 1 else O if utility_ == -1 else None
+
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-
-    if winner(board): 
-        return True
-
-    # loop throw rows and columns, if there is an empty spot return false
-    for row in board:
-        for column in row:
-            if column == EMPTY: 
-                return False
-    
-    return True
-
+    if game is not None:
+        return game.terminal(*encode(board))
+    return bitboard.terminal(*encode(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    
-    winner_ = winner(board)
+    if game is not None:
+        return game.utility(*encode(board))
+    return bitboard.utility(*encode(board))
 
-    return 1 if winner_ == X else -1 if winner_== O else 0
 
-
-def minimax(board):
+def minimax(board, time_limit=mnk.TIME_LIMIT, stop=None):
     """
     Returns the optimal action for the current player on the board.
-    """
-    
-    # if game is already over return None
-    if terminal(board):
-        return None
-    
-    if player(board) == X:
-
-        alpha = -math.inf
-
-        # looping through every possible action
-        for action in actions(board):
-
-            # getting the optimal move for the other player given the resulting board from the current action
-            v = min_value(result(board, action), alpha)
-
-            # if that move has a higher value than alpha, set alpha to that value and store the action
-            if v > alpha:
-                alpha = v
-                best_action = action
-
-        return best_action   
 
+    On boards other than 3x3 this is the best action found within
+    time_limit seconds, or before the threading.Event stop is set by
+    another thread. The 3x3 game is looked up or solved too quickly to
+    need stopping.
+    """
+    if game is not None:
+        cell = game.best_move(*encode(board), time_limit, stop)
     else:
+        cell = bitboard.best_move(*encode(board))
+    return None if cell is None else divmod(cell, COLS)
 
-        beta = math.inf
-
-        # looping through every possible action
-        for action in actions(board):
-
-            # getting the optimal move for the other player given the resulting board from the current action
-            v = max_value(result(board, action), beta)
-
-            # if that move has a lower value than beta, set beta to that value and store the action
-            if v < beta:
-                beta = v
-                best_action = action
-            
-        return best_action
 
-
-def max_value(board, beta):
+def likely_actions(board, n):
     """
-        Returns the max utility outcome of the given board state. Takes in a variable beta to incorporate alpha-beta pruning.
+    Returns up to n actions on the board in the order the search would try
+    them, as a guess at the moves a player is most likely to make.
     """
-
-    # if game is over return the utility of the winner
-    if terminal(board):
-        return utility(board)
-    
-    alpha = -math.inf
-
-    # loop through every possible action
-    for action in actions(board):
-
-        # setting alpha to the max of alpha and the result of the optimal move of the other player
-        alpha = max(alpha, min_value(result(board, action), alpha))
-
-        # if alpha >= beta, then we can prune because this is would mean the optimal move of the maximizing player is going to be higher than the beta, that we are trying to minimize, we have already found
-        if alpha >= beta:
-            break
-    
-    return alpha
+    x, o = encode(board)
+    if game is not None:
+        cells = game.candidates(x, o)
+    else:
+        cells = [cell for cell in bitboard.ORDER if not (x | o) >> cell & 1]
+    return [divmod(cell, COLS) for cell in cells[:n]]
 
 
-def min_value(board, alpha):
+def search_stats():
     """
-        Returns the minimum utility outcome of the given board state. Takes in a variable alpha to incorporate alpha-beta pruning.
+    Returns the SearchStats of the last call to minimax: nodes visited,
+    cutoffs and the deepest ply searched (all 0 if the move was looked up).
     """
-
-    # if game is over return the utility of the winner
-    if terminal(board):
-        return utility(board)
-
-    beta = math.inf
-
-    # loop through every possible action
-    for action in actions(board):
-
-        # set beta to the minimum of beta and the result of the optimal move of the other player
-        beta = min(beta, max_value(result(board, action), beta))
-
-        # if beta <= alpha, then we can prune because this would mean the optimal move of the minimizing player is lower than the alpha, that we are trying to maximize, that we have already found
-        if beta <= alpha:
-            break
-    
-    return beta
\ No newline at end of file
+    return game.stats if game is not None else bitboard.stats
@@ -0,0 +1,112 @@
+"""
+Background search for runner.py, so the window keeps responding while the
+computer thinks.
+
+A single thread runs minimax on the boards it is asked about, most urgent
+first. While the human is thinking it also searches the boards their most
+likely replies would lead to, so the answer is often ready by the time
+they move.
+"""
+
+import threading
+
+import mnk
+import tictactoe as ttt
+
+# Number of likely human replies to search ahead of time
+SPECULATE = 3
+
+
+class SearchWorker():
+    """
+    Runs minimax in a daemon thread. request() asks for a move, poll()
+    returns it once found, speculate() queues likely future positions and
+    cancel() forgets everything, stopping the search in progress.
+    """
+
+    def __init__(self, time_limit=mnk.TIME_LIMIT):
+        self.time_limit = time_limit
+        self.condition = threading.Condition()
+
+        # keys of boards waiting to be searched, most urgent first, and the boards themselves
+        self.pending = []
+        self.boards = {}
+
+        # moves found, by board key
+        self.results = {}
+
+        # the key being searched, and the event that stops its search early (its result then discarded)
+        self.running = None
+        self.stop = threading.Event()
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def key(self, board):
+        return tuple(tuple(row) for row in board)
+
+    def request(self, board):
+        """Asks for the move on board, ahead of any speculative searches."""
+        key = self.key(board)
+        with self.condition:
+            if key in self.results or key == self.running and not self.stop.is_set():
+                return
+
+            # stop a speculative search that turned out not to be needed, searching it again later
+            # (unless it was cancelled, its board then being gone)
+            if self.running is not None and not self.stop.is_set():
+                self.stop.set()
+                self.pending.insert(0, self.running)
+
+            if key in self.pending:
+                self.pending.remove(key)
+            self.pending.insert(0, key)
+            self.boards[key] = board
+            self.condition.notify()
+
+    def speculate(self, board, n=SPECULATE):
+        """Queues the boards after the n likeliest replies on board, behind any requests."""
+        with self.condition:
+            for action in ttt.likely_actions(board, n):
+                reply = ttt.result(board, action)
+                key = self.key(reply)
+                if ttt.terminal(reply) or key in self.results or key in self.pending or key == self.running:
+                    continue
+                self.pending.append(key)
+                self.boards[key] = reply
+            self.condition.notify()
+
+    def poll(self, board):
+        """Returns the move found on board, or None if it is not ready."""
+        with self.condition:
+            return self.results.get(self.key(board))
+
+    def cancel(self):
+        """Drops every pending search and result, stopping the one in progress."""
+        with self.condition:
+            self.pending.clear()
+            self.boards.clear()
+            self.results.clear()
+            if self.running is not None:
+                self.stop.set()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                key = self.pending.pop(0)
+                board = self.boards.get(key)
+                if board is None:
+                    continue
+                self.running = key
+
+                # a fresh event for each search, so a stop set before the search starts is not lost
+                self.stop = stop = threading.Event()
+
+            move = ttt.minimax(board, self.time_limit, stop)
+
+            with self.condition:
+                if not stop.is_set():
+                    self.results[key] = move
+                self.running = None
@@ -1,7 +1,9 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    __slots__ = ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -43,6 +45,7 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
@@ -70,6 +73,8 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
@@ -94,6 +99,8 @@ class Not(Sentence):
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
@@ -127,10 +134,12 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
@@ -158,10 +167,12 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -189,10 +200,12 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set().union(self.antecedent.symbols(), self.consequent.symbols())
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -222,11 +235,157 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return set().union(self.left.symbols(), self.right.symbols())
+
+
+class Frozen():
+    """
+    Mixin for immutable, interned sentences. Building a frozen sentence
+    equal to one that already exists returns the existing object, so equal
+    subtrees are shared, equality is identity, and the hash, symbols and
+    formula are worked out once when the sentence is built.
+    """
+    __slots__ = ()
+
+    # every frozen sentence alive, by its class and parts
+    interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *parts):
+
+        # every part is a sentence, except a symbol's name
+        if not issubclass(cls, Symbol):
+            for part in parts:
+                Sentence.validate(part)
+            parts = tuple(freeze(part) for part in parts)
+        key = (cls,) + parts
+        sentence = Frozen.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.build(*parts)
+            symbols = frozenset(super(Frozen, sentence).symbols())
+
+            # share a part's set when it already has every symbol, as is usual for large sentences
+            symbols = next((part._symbols for part in parts
+                            if isinstance(part, Sentence) and part._symbols == symbols), symbols)
+            sentence.set(_hash=super(Frozen, sentence).__hash__(), _symbols=symbols, _formula=None)
+            Frozen.interned[key] = sentence
+        return sentence
+
+    def __init__(self, *parts):
+        pass
+
+    def __setattr__(self, name, value):
+        raise AttributeError("frozen sentences cannot be changed")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Frozen) or not isinstance(other, Sentence):
+            return False
+        return freeze(other) is self
+
+    def __hash__(self):
+        return self._hash
+
+    def formula(self):
+
+        # built on first use, as every node keeping its whole formula would take space quadratic in depth
+        if self._formula is None:
+            self.set(_formula=super().formula())
+        return self._formula
+
+    def symbols(self):
+        return self._symbols
+
+    def set(self, **fields):
+        """Sets fields, for building the sentence and caching its formula."""
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+
+class FrozenSymbol(Frozen, Symbol):
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    def build(self, name):
+        self.set(name=name)
+
+
+class FrozenNot(Frozen, Not):
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
 
+    def build(self, operand):
+        self.set(operand=operand)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+
+class FrozenAnd(Frozen, And):
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    def build(self, *conjuncts):
+        self.set(conjuncts=conjuncts)
+
+    def add(self, conjunct):
+        raise TypeError("frozen sentences cannot be changed, build a new FrozenAnd")
+
+
+class FrozenOr(Frozen, Or):
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    def build(self, *disjuncts):
+        self.set(disjuncts=disjuncts)
+
+
+class FrozenImplication(Frozen, Implication):
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    def build(self, antecedent, consequent):
+        self.set(antecedent=antecedent, consequent=consequent)
+
+
+class FrozenBiconditional(Frozen, Biconditional):
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    def build(self, left, right):
+        self.set(left=left, right=right)
+
+
+def freeze(sentence):
+    """Returns the frozen, interned equivalent of a sentence."""
+    if isinstance(sentence, Frozen):
+        return sentence
+    Sentence.validate(sentence)
+    if isinstance(sentence, Symbol):
+        return FrozenSymbol(sentence.name)
+    if isinstance(sentence, Not):
+        return FrozenNot(sentence.operand)
+    if isinstance(sentence, And):
+        return FrozenAnd(*sentence.conjuncts)
+    if isinstance(sentence, Or):
+        return FrozenOr(*sentence.disjuncts)
+    if isinstance(sentence, Implication):
+        return FrozenImplication(sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, Biconditional):
+        return FrozenBiconditional(sentence.left, sentence.right)
+    raise TypeError(f"cannot freeze {type(sentence).__name__}")
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    method "enumerate" checks every model, "truthtable" checks them all at
+    once as NumPy arrays (see truthtable.py), and "sat" asks a SAT solver
+    whether knowledge ∧ ¬query has any model (see sat.py), which scales to
+    far more symbols. All give the same answer.
+    """
+
+    if method == "sat":
+        import sat
+        return sat.entails(knowledge, query)
+    if method == "truthtable":
+        import truthtable
+        return truthtable.entails(knowledge, query)
+    if method != "enumerate":
+        raise ValueError(f"unknown model checking method: {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +416,48 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set().union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# What a knowledge base says about a query
+ENTAILED = "entailed"
+REFUTED = "refuted"
+UNKNOWN = "unknown"
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks many queries against a knowledge base in one pass over its models,
+    returning for each query ENTAILED if it is true in every model of the
+    knowledge base, REFUTED if it is false in every one, and UNKNOWN if
+    it is true in some and false in others. As with model_check, every query
+    is entailed when the knowledge base has no models.
+    """
+    queries = list(queries)
+    symbols = sorted(set().union(knowledge.symbols(), *(query.symbols() for query in queries)))
+
+    # whether each query has been true, and false, in a model of the knowledge base
+    true = [False] * len(queries)
+    false = [False] * len(queries)
+    undecided = set(range(len(queries)))
+    for values in itertools.product((True, False), repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if not knowledge.evaluate(model):
+            continue
+        for i in list(undecided):
+            if queries[i].evaluate(model):
+                true[i] = True
+            else:
+                false[i] = True
+            if true[i] and false[i]:
+                undecided.remove(i)
+
+        # stop once no further model can change an answer
+        if not undecided:
+            break
+
+    return [REFUTED if false[i] and not true[i] else UNKNOWN if false[i] else ENTAILED
+            for i in range(len(queries))]
@@ -97,8 +97,8 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            for symbol, verdict in zip(symbols, model_check_all(knowledge, symbols)):
+                if verdict == ENTAILED:
                     print(f"    {symbol}")
 
 
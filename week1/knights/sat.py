@@ -0,0 +1,323 @@
+"""
+Entailment by satisfiability: knowledge entails query exactly when
+knowledge ∧ ¬query has no model.
+
+Sentences are turned into clauses (CNF) with the Tseitin encoding, which
+gives every connective its own variable instead of distributing Or over
+And, so the clauses grow linearly with the sentence. The clauses are
+solved by conflict-driven clause learning (CDCL) with two watched literals
+per clause.
+
+Variables are numbered from 1, and a literal is a variable or its negation
+(-variable).
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Encoder():
+    """
+    Collects the clauses of sentences in Tseitin form, with one variable per
+    symbol name and one per connective.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = {}
+        self.count = 0
+        self.true = None
+
+        # literal of each sentence already encoded, by id so shared subtrees are encoded once
+        self.literals = {}
+
+    def variable(self):
+        """Returns a new variable."""
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """Returns the variable of the symbol called name."""
+        if name not in self.variables:
+            self.variables[name] = self.variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when sentence is, adding the
+        clauses that define it.
+        """
+        key = id(sentence)
+        if key not in self.literals:
+            self.literals[key] = (sentence, self.encode(sentence))
+        return self.literals[key][1]
+
+    def encode(self, sentence):
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        if isinstance(sentence, (And, Or)):
+            operands = [self.literal(operand)
+                        for operand in (sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts)]
+
+            # an empty And is true and an empty Or false
+            if not operands:
+                return self.constant() if isinstance(sentence, And) else -self.constant()
+
+            # v ∧ ... for And, and the same with every sign flipped for Or (¬v ↔ ¬a ∧ ¬b ...)
+            sign = 1 if isinstance(sentence, And) else -1
+            v = self.variable()
+            for operand in operands:
+                self.clauses.append([-sign * v, sign * operand])
+            self.clauses.append([sign * v] + [-sign * operand for operand in operands])
+            return v
+
+        if isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.variable()
+            self.clauses.extend([[-v, -a, b], [v, a], [v, -b]])
+            return v
+
+        if isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.variable()
+            self.clauses.extend([[-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b]])
+            return v
+
+        raise TypeError(f"cannot convert {type(sentence).__name__} to CNF")
+
+    def constant(self):
+        """Returns a variable that is always true."""
+        if self.true is None:
+            self.true = self.variable()
+            self.clauses.append([self.true])
+        return self.true
+
+
+class Solver():
+    """
+    CDCL SAT solver. Each clause watches two of its literals that are not
+    false, and is only looked at when one of them becomes false: then it
+    either finds another literal to watch, forces its other watched literal
+    (unit propagation), or is a conflict. A conflict is analysed back to its
+    first unique implication point, the resulting clause is learned, and
+    the search jumps back to the level where that clause forces a literal.
+    Decisions pick the variable most involved in recent conflicts (VSIDS).
+    """
+
+    # Factor activity bumps grow by after each conflict, so recent conflicts count more
+    DECAY = 1 / 0.95
+
+    def __init__(self, clauses=()):
+        self.clauses = []
+        self.watches = {}
+        self.values = {}
+        self.levels = {}
+        self.reasons = {}
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.activity = {}
+        self.heap = []
+        self.bump_size = 1.0
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, literals):
+        """Adds a clause, a list of literals at least one of which must be true."""
+        clause = list(dict.fromkeys(literals))
+        if any(-literal in clause for literal in clause):
+            return
+        for literal in clause:
+            variable = abs(literal)
+            if variable not in self.activity:
+                self.activity[variable] = 0.0
+                heapq.heappush(self.heap, (0.0, variable))
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            value = self.value(clause[0])
+            if value is False:
+                self.unsatisfiable = True
+            elif value is None:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores the clause, watching its first two literals, and returns its index."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def value(self, literal):
+        """Returns True or False if the literal is assigned, otherwise None."""
+        value = self.values.get(abs(literal))
+        if value is None:
+            return None
+        return value == (literal > 0)
+
+    def assign(self, literal, reason):
+        """Makes literal true at the current level, reason being the index of the clause that forced it."""
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a unit clause, returning the index of
+        a clause made false (a conflict) or None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+
+                # keep the false literal in the second slot
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        kept.extend(watching[position + 1:])
+                        self.watches[false] = kept
+                        return index
+                    self.assign(clause[0], index)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the learned clause for a conflict, with the literal it forces
+        first, and the level to jump back to.
+        """
+        level = len(self.limits)
+        learned = []
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # walk back along the trail to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        # the literal of the highest remaining level goes second, so it is watched
+        learned.insert(0, -literal)
+        back = 0
+        if len(learned) > 1:
+            highest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+            learned[1], learned[highest] = learned[highest], learned[1]
+            back = self.levels[abs(learned[1])]
+        self.bump_size *= self.DECAY
+        return learned, back
+
+    def bump(self, variable):
+        self.activity[variable] += self.bump_size
+        heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+        # rescale before activities overflow
+        if self.activity[variable] > 1e100:
+            for other in self.activity:
+                self.activity[other] *= 1e-100
+            self.bump_size *= 1e-100
+            self.heap = [(-activity, other) for other, activity in self.activity.items()]
+            heapq.heapify(self.heap)
+
+    def backtrack(self, level):
+        """Undoes every assignment made above level."""
+        while len(self.trail) > self.limits[level]:
+            variable = abs(self.trail.pop())
+            del self.values[variable]
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity, or None if all are assigned."""
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if variable not in self.values and -activity == self.activity[variable]:
+                return variable
+        return None
+
+    def solve(self):
+        """Returns True if the clauses have a model (left in values), False if not."""
+        if self.unsatisfiable:
+            return False
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.unsatisfiable = True
+                    return False
+                learned, back = self.analyze(conflict)
+                self.backtrack(back)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+            else:
+                variable = self.decide()
+                if variable is None:
+                    return True
+                self.limits.append(len(self.trail))
+                self.assign(-variable, None)
+
+
+def satisfiable(sentence):
+    """Returns True if some model makes sentence true."""
+    encoder = Encoder()
+    encoder.clauses.append([encoder.literal(sentence)])
+    return Solver(encoder.clauses).solve()
+
+
+def entails(knowledge, query):
+    """Returns True if every model of knowledge is a model of query."""
+    encoder = Encoder()
+    encoder.clauses.append([encoder.literal(knowledge)])
+    encoder.clauses.append([-encoder.literal(query)])
+    return not Solver(encoder.clauses).solve()
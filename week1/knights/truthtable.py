@@ -0,0 +1,81 @@
+"""
+Entailment by truth table, with NumPy.
+
+Number the models of n symbols 0 to 2^n - 1, symbol i being true in the
+models whose bit i is set. A sentence is compiled once into a function of
+the symbols' columns (one boolean per model), with each connective an array
+operation, so every model is checked at once. Models are taken in chunks of
+2^chunk_bits to bound memory: within a chunk the columns of the low symbols
+repeat the same pattern, and the others are constant.
+"""
+
+import functools
+
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Symbols beyond which checking every model would take too long
+MAX_SYMBOLS = 30
+
+# Default models per chunk, as a power of two
+CHUNK_BITS = 20
+
+
+def compile_sentence(sentence, index):
+    """
+    Returns a function from a list of symbol columns to the sentence's
+    column, index mapping each symbol name to its position in the list.
+    """
+    if isinstance(sentence, Symbol):
+        i = index[sentence.name]
+        return lambda columns: columns[i]
+
+    if isinstance(sentence, Not):
+        operand = compile_sentence(sentence.operand, index)
+        return lambda columns: ~operand(columns)
+
+    if isinstance(sentence, (And, Or)):
+        empty = np.True_ if isinstance(sentence, And) else np.False_
+        operation = np.logical_and if isinstance(sentence, And) else np.logical_or
+        operands = [compile_sentence(operand, index)
+                    for operand in (sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts)]
+        return lambda columns: functools.reduce(operation, (operand(columns) for operand in operands), empty)
+
+    if isinstance(sentence, Implication):
+        antecedent = compile_sentence(sentence.antecedent, index)
+        consequent = compile_sentence(sentence.consequent, index)
+        return lambda columns: ~antecedent(columns) | consequent(columns)
+
+    if isinstance(sentence, Biconditional):
+        left = compile_sentence(sentence.left, index)
+        right = compile_sentence(sentence.right, index)
+        return lambda columns: left(columns) == right(columns)
+
+    raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+
+def chunks(n, chunk_bits=CHUNK_BITS):
+    """
+    Yields the symbol columns of n symbols for each chunk of models in turn,
+    as lists of arrays (low symbols) and scalars (symbols constant in the chunk).
+    """
+    if n > MAX_SYMBOLS:
+        raise ValueError(f"too many symbols for a truth table: {n}")
+    bits = min(n, chunk_bits)
+    models = np.arange(2 ** bits)
+    low = [(models >> i & 1).astype(bool) for i in range(bits)]
+    for start in range(0, 2 ** n, 2 ** bits):
+        yield low + [np.bool_(start >> i & 1) for i in range(bits, n)]
+
+
+def entails(knowledge, query, chunk_bits=CHUNK_BITS):
+    """Returns True if query is true in every model where knowledge is."""
+    symbols = sorted(set().union(knowledge.symbols(), query.symbols()))
+    index = {name: i for i, name in enumerate(symbols)}
+    knowledge = compile_sentence(knowledge, index)
+    query = compile_sentence(query, index)
+    for columns in chunks(len(symbols), chunk_bits):
+        if np.any(knowledge(columns) & ~query(columns)):
+            return False
+    return True